@@ -0,0 +1,65 @@
+"""Initial schema: users and games
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(), nullable=True),
+        sa.Column("password_hash", sa.String(), nullable=True),
+        sa.Column("is_admin", sa.Boolean(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    op.create_table(
+        "games",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column(
+            "status",
+            sa.Enum("BACKLOG", "FINISHED", name="gamestatus"),
+            nullable=True,
+        ),
+        sa.Column("hype_score", sa.Integer(), nullable=True),
+        sa.Column("rating", sa.Float(), nullable=True),
+        sa.Column(
+            "progress",
+            sa.Enum("STARTED", "HALFWAY", "ADVANCED", "FINISHED", name="gameprogress"),
+            nullable=True,
+        ),
+        sa.Column("playtime_hours", sa.Float(), nullable=True),
+        sa.Column("finish_year", sa.Integer(), nullable=True),
+        sa.Column("release_year", sa.Integer(), nullable=True),
+        sa.Column("price", sa.Float(), nullable=True),
+        sa.Column("platform", sa.String(), nullable=True),
+        sa.Column("steam_deck", sa.Boolean(), nullable=True),
+        sa.Column("notes", sa.String(), nullable=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+    )
+    op.create_index("ix_games_id", "games", ["id"])
+    op.create_index("ix_games_title", "games", ["title"])
+
+
+def downgrade():
+    op.drop_index("ix_games_title", table_name="games")
+    op.drop_index("ix_games_id", table_name="games")
+    op.drop_table("games")
+    op.drop_index("ix_users_username", table_name="users")
+    op.drop_index("ix_users_id", table_name="users")
+    op.drop_table("users")
+    sa.Enum(name="gameprogress").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="gamestatus").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,23 @@
+"""Composite indexes on games scoped by user
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_games_user_id_status", "games", ["user_id", "status"])
+    op.create_index("ix_games_user_id_title", "games", ["user_id", "title"])
+
+
+def downgrade():
+    op.drop_index("ix_games_user_id_title", table_name="games")
+    op.drop_index("ix_games_user_id_status", table_name="games")
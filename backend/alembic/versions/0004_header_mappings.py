@@ -0,0 +1,34 @@
+"""Learned import header mappings per user
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "header_mappings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("db_column", sa.String(), nullable=True),
+        sa.Column("header", sa.String(), nullable=True),
+        sa.UniqueConstraint(
+            "user_id", "db_column", name="uq_header_mappings_user_column"
+        ),
+    )
+    op.create_index("ix_header_mappings_user_id", "header_mappings", ["user_id"])
+
+
+def downgrade():
+    op.drop_index("ix_header_mappings_user_id", table_name="header_mappings")
+    op.drop_table("header_mappings")
@@ -0,0 +1,58 @@
+"""Game timestamps and delete tombstones for delta sync
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("games") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "created_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+                nullable=True,
+            )
+        )
+        batch_op.add_column(
+            sa.Column(
+                "updated_at",
+                sa.DateTime(timezone=True),
+                server_default=sa.func.now(),
+                nullable=True,
+            )
+        )
+    op.create_index("ix_games_user_id_updated_at", "games", ["user_id", "updated_at"])
+
+    op.create_table(
+        "game_tombstones",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("game_id", sa.Integer(), nullable=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "ix_game_tombstones_user_id_deleted_at",
+        "game_tombstones",
+        ["user_id", "deleted_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_game_tombstones_user_id_deleted_at", table_name="game_tombstones")
+    op.drop_table("game_tombstones")
+    op.drop_index("ix_games_user_id_updated_at", table_name="games")
+    with op.batch_alter_table("games") as batch_op:
+        batch_op.drop_column("updated_at")
+        batch_op.drop_column("created_at")
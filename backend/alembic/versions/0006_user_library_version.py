@@ -0,0 +1,29 @@
+"""Per-user library version for ETags
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "library_version", sa.Integer(), nullable=False, server_default="0"
+            )
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("library_version")
@@ -0,0 +1,60 @@
+"""Per-user library statistics
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+# Same buckets crud.add_game_stats produces: enum names as stored, years as
+# text and "" for missing values. Enums are cast first since '' isn't a
+# valid label of the Postgres enum types
+DIMENSIONS = {
+    "all": "''",
+    "status": "COALESCE(CAST(status AS VARCHAR), '')",
+    "platform": "COALESCE(platform, '')",
+    "finish_year": "COALESCE(CAST(finish_year AS VARCHAR), '')",
+    "progress": "COALESCE(CAST(progress AS VARCHAR), '')",
+}
+
+
+def upgrade():
+    op.create_table(
+        "library_stats",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("dimension", sa.String(), nullable=False),
+        sa.Column("bucket", sa.String(), nullable=False),
+        sa.Column("games", sa.Integer(), nullable=False),
+        sa.Column("rating_sum", sa.Float(), nullable=False),
+        sa.Column("rating_count", sa.Integer(), nullable=False),
+        sa.Column("playtime_sum", sa.Float(), nullable=False),
+        sa.Column("price_sum", sa.Float(), nullable=False),
+        sa.UniqueConstraint(
+            "user_id", "dimension", "bucket", name="uq_library_stats_bucket"
+        ),
+    )
+
+    for dimension, bucket in DIMENSIONS.items():
+        op.execute(f"""
+            INSERT INTO library_stats (user_id, dimension, bucket, games,
+                rating_sum, rating_count, playtime_sum, price_sum)
+            SELECT user_id, '{dimension}', {bucket}, COUNT(*),
+                COALESCE(SUM(rating), 0), COUNT(rating),
+                COALESCE(SUM(playtime_hours), 0), COALESCE(SUM(price), 0)
+            FROM games
+            WHERE user_id IS NOT NULL
+            GROUP BY user_id, {bucket}
+            """)
+
+
+def downgrade():
+    op.drop_table("library_stats")
@@ -0,0 +1,69 @@
+"""Full-text search index on game titles and notes
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTOR = (
+    "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(notes, ''))"
+)
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(f"CREATE INDEX ix_games_search ON games USING gin ({SEARCH_VECTOR})")
+        op.execute(
+            "CREATE INDEX ix_games_title_trgm ON games USING gin (title gin_trgm_ops)"
+        )
+        return
+
+    # External-content FTS5 table over games, kept in sync by triggers
+    op.execute("""
+        CREATE VIRTUAL TABLE games_fts USING fts5(
+            title, notes, content='games', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """)
+    op.execute("""
+        CREATE TRIGGER games_fts_insert AFTER INSERT ON games BEGIN
+            INSERT INTO games_fts (rowid, title, notes)
+            VALUES (new.id, new.title, new.notes);
+        END
+        """)
+    op.execute("""
+        CREATE TRIGGER games_fts_delete AFTER DELETE ON games BEGIN
+            INSERT INTO games_fts (games_fts, rowid, title, notes)
+            VALUES ('delete', old.id, old.title, old.notes);
+        END
+        """)
+    op.execute("""
+        CREATE TRIGGER games_fts_update AFTER UPDATE OF title, notes ON games BEGIN
+            INSERT INTO games_fts (games_fts, rowid, title, notes)
+            VALUES ('delete', old.id, old.title, old.notes);
+            INSERT INTO games_fts (rowid, title, notes)
+            VALUES (new.id, new.title, new.notes);
+        END
+        """)
+    op.execute("INSERT INTO games_fts (games_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX ix_games_title_trgm")
+        op.execute("DROP INDEX ix_games_search")
+        return
+
+    op.execute("DROP TRIGGER games_fts_update")
+    op.execute("DROP TRIGGER games_fts_delete")
+    op.execute("DROP TRIGGER games_fts_insert")
+    op.execute("DROP TABLE games_fts")
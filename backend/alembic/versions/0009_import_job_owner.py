@@ -0,0 +1,25 @@
+"""Owner of each import job
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("import_jobs") as batch_op:
+        batch_op.add_column(sa.Column("owner", sa.String(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("import_jobs") as batch_op:
+        batch_op.drop_column("owner")
@@ -0,0 +1,25 @@
+"""Cancel requests for import jobs run by another process
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("import_jobs") as batch_op:
+        batch_op.add_column(sa.Column("cancel_requested", sa.Boolean(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("import_jobs") as batch_op:
+        batch_op.drop_column("cancel_requested")
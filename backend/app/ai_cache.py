@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+from .schemas import GameAIImport
+
+logger = logging.getLogger(__name__)
+
+# Set AI_CACHE_PATH to an empty string to disable the cache
+AI_CACHE_PATH = os.environ.get("AI_CACHE_PATH", "./ai_cache.db")
+AI_CACHE_TTL_SECONDS = float(os.environ.get("AI_CACHE_TTL_SECONDS", str(30 * 86400)))
+AI_CACHE_MAX_ENTRIES = int(os.environ.get("AI_CACHE_MAX_ENTRIES", "50000"))
+
+
+def make_key(
+    model: str,
+    prompt_version: str,
+    status_choice: str,
+    extra_instructions: Optional[str],
+    column_names: list,
+    row_values: list,
+    row_colors: list,
+) -> str:
+    raw = json.dumps(
+        [
+            model,
+            prompt_version,
+            status_choice,
+            extra_instructions or "",
+            column_names,
+            row_values,
+            row_colors,
+        ],
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AIResultCache:
+    """
+    Content-addressed store of validated AI row parses, kept in a local
+    SQLite file so re-uploading a sheet only sends the rows that changed.
+    Entries expire after `ttl` seconds; beyond `max_entries` the least
+    recently used ones are dropped.
+
+    SQLite work runs in a worker thread so it never blocks the event loop.
+    New results and access times are buffered and written in one
+    transaction per `flush_every` entries and at the end of each run
+    (evict).
+    """
+
+    def __init__(self, path: str, ttl: float, max_entries: int, flush_every: int = 200):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.flush_every = flush_every
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        # The connection is shared by worker threads, one at a time
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Tuple[str, float]] = {}  # key -> (value, created)
+        self._touched: Dict[str, float] = {}  # key -> accessed
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ai_results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_ai_results_accessed "
+                "ON ai_results (accessed)"
+            )
+        return self._conn
+
+    def _read(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            return (
+                self._connection()
+                .execute("SELECT value, created FROM ai_results WHERE key = ?", (key,))
+                .fetchone()
+            )
+
+    def _write(self, pending: dict, touched: dict, evict: bool = False):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO ai_results (key, value, created, accessed) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (key, value, created, created)
+                        for key, (value, created) in pending.items()
+                    ],
+                )
+                conn.executemany(
+                    "UPDATE ai_results SET accessed = ? WHERE key = ?",
+                    [(accessed, key) for key, accessed in touched.items()],
+                )
+                if evict:
+                    conn.execute(
+                        "DELETE FROM ai_results WHERE created < ?",
+                        (time.time() - self.ttl,),
+                    )
+                    conn.execute(
+                        "DELETE FROM ai_results WHERE key IN ("
+                        "SELECT key FROM ai_results ORDER BY accessed DESC "
+                        "LIMIT -1 OFFSET ?)",
+                        (self.max_entries,),
+                    )
+
+    def _take_buffers(self) -> Tuple[dict, dict]:
+        pending, touched = self._pending, self._touched
+        self._pending, self._touched = {}, {}
+        return pending, touched
+
+    async def get(self, key: str) -> Optional[GameAIImport]:
+        now = time.time()
+        try:
+            row = self._pending.get(key) or await asyncio.to_thread(self._read, key)
+            if row is None or row[1] < now - self.ttl:
+                self.misses += 1
+                return None
+            result = GameAIImport.model_validate_json(row[0])
+        except Exception as e:
+            logger.warning(f"AI cache read error: {e}")
+            self.misses += 1
+            return None
+        self._touched[key] = now
+        self.hits += 1
+        return result
+
+    async def put(self, key: str, result: GameAIImport):
+        self._pending[key] = (result.model_dump_json(), time.time())
+        if len(self._pending) + len(self._touched) >= self.flush_every:
+            await self.flush()
+
+    async def flush(self, evict: bool = False):
+        pending, touched = self._take_buffers()
+        try:
+            await asyncio.to_thread(self._write, pending, touched, evict)
+        except Exception as e:
+            logger.warning(f"AI cache write error: {e}")
+
+    async def evict(self):
+        """
+        Writes buffered entries, then drops expired ones and the least
+        recently used over the limit.
+        """
+        await self.flush(evict=True)
+
+    async def stats(self) -> dict:
+        def count():
+            with self._lock:
+                return (
+                    self._connection()
+                    .execute("SELECT COUNT(*) FROM ai_results")
+                    .fetchone()[0]
+                )
+
+        size = 0
+        try:
+            size = await asyncio.to_thread(count)
+        except Exception:
+            pass
+        return {"hits": self.hits, "misses": self.misses, "size": size}
+
+    async def close(self):
+        await self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+cache: Optional[AIResultCache] = (
+    AIResultCache(AI_CACHE_PATH, AI_CACHE_TTL_SECONDS, AI_CACHE_MAX_ENTRIES)
+    if AI_CACHE_PATH
+    else None
+)
+
+
+async def close_cache():
+    if cache is not None:
+        await cache.close()
@@ -1,8 +1,16 @@
 import os
 import json
+import asyncio
+import random
+import time
 import logging
+from collections import deque
+from typing import AsyncIterator, Iterable, Tuple, Any, Optional
+import httpx
+import openai
 from openai import AsyncOpenAI
 from .schemas import GameAIImport
+from . import ai_cache
 from .models import GameStatus, GameProgress
 
 logger = logging.getLogger(__name__)
@@ -11,6 +19,27 @@ KIMI_API_KEY = os.environ.get("KIMI_API_KEY", "")
 KIMI_BASE_URL = os.environ.get("KIMI_BASE_URL", "https://api.moonshot.ai/v1")
 KIMI_MODEL = os.environ.get("KIMI_MODEL", "kimi-k2-0711-preview")
 
+# Pipeline tuning
+AI_MAX_CONCURRENCY = int(os.environ.get("AI_MAX_CONCURRENCY", "4"))
+AI_REQUESTS_PER_MINUTE = float(os.environ.get("AI_REQUESTS_PER_MINUTE", "60"))
+AI_MAX_RETRIES = int(os.environ.get("AI_MAX_RETRIES", "4"))
+AI_BACKOFF_BASE = float(os.environ.get("AI_BACKOFF_BASE", "1.0"))
+AI_BACKOFF_MAX = float(os.environ.get("AI_BACKOFF_MAX", "30.0"))
+
+# Multi-row requests: rows per request are capped by count and by an
+# estimated token budget for the row data
+AI_MAX_BATCH_ROWS = int(os.environ.get("AI_MAX_BATCH_ROWS", "20"))
+AI_BATCH_TOKEN_BUDGET = int(os.environ.get("AI_BATCH_TOKEN_BUDGET", "2000"))
+
+# HTTP connection pool of the shared client
+AI_MAX_CONNECTIONS = int(os.environ.get("AI_MAX_CONNECTIONS", "20"))
+AI_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("AI_MAX_KEEPALIVE_CONNECTIONS", "10"))
+AI_KEEPALIVE_EXPIRY = float(os.environ.get("AI_KEEPALIVE_EXPIRY", "60"))
+AI_TIMEOUT = float(os.environ.get("AI_TIMEOUT", "120"))
+
+# Bump when the prompts or GAME_SCHEMA change, so cached parses are not reused
+PROMPT_VERSION = "2"
+
 # JSON schema for the AI to follow
 GAME_SCHEMA = {
     "type": "object",
@@ -77,44 +106,138 @@ GAME_SCHEMA = {
 }
 
 
+class TokenBucket:
+    """Async token bucket; `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+# Shared by every import in this process, since the API limit is per key
+rate_limiter = TokenBucket(
+    rate=AI_REQUESTS_PER_MINUTE / 60, capacity=max(1, AI_MAX_CONCURRENCY)
+)
+
+
+# One client (and connection pool) per application lifespan, see main.lifespan
+_client: Optional[AsyncOpenAI] = None
+
+# Connection reuse counters: requests sent vs TCP connections opened
+connection_stats = {"requests": 0, "connections_opened": 0}
+
+
+async def _trace(event_name: str, info: dict):
+    if event_name == "connection.connect_tcp.complete":
+        connection_stats["connections_opened"] += 1
+
+
+async def _on_request(request: httpx.Request):
+    connection_stats["requests"] += 1
+    request.extensions["trace"] = _trace
+
+
+def init_client() -> AsyncOpenAI:
+    global _client
+    if _client is None:
+        if not KIMI_API_KEY:
+            raise openai.OpenAIError("KIMI_API_KEY is not set")
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=AI_MAX_CONNECTIONS,
+                max_keepalive_connections=AI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=AI_KEEPALIVE_EXPIRY,
+            ),
+            timeout=AI_TIMEOUT,
+            event_hooks={"request": [_on_request]},
+        )
+        # Retries are handled by _create_completion
+        _client = AsyncOpenAI(
+            api_key=KIMI_API_KEY,
+            base_url=KIMI_BASE_URL,
+            max_retries=0,
+            http_client=http_client,
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+        logger.info(
+            f"AI client closed: {connection_stats['requests']} requests over "
+            f"{connection_stats['connections_opened']} connections"
+        )
+
+
 def get_client() -> AsyncOpenAI:
-    return AsyncOpenAI(api_key=KIMI_API_KEY, base_url=KIMI_BASE_URL)
+    # Created lazily when running outside the app lifespan (scripts, tests)
+    return init_client()
 
 
-async def process_row_with_ai(
-    column_names: list[str],
-    row_values: list,
-    status_choice: str,
-    extra_instructions: str = None,
-    row_colors: list = None,
-) -> GameAIImport | None:
-    """
-    Sends one Excel row to Kimi K2.5 and returns a GameAIImport object.
-    status_choice is either 'backlog' or 'finished'.
-    row_colors: list of hex strings or None corresponding to row_values
-    """
-    client = get_client()
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500
+    return False
 
-    # Build the row representation
-    row_parts = []
-    for i, (col, val) in enumerate(zip(column_names, row_values)):
-        if val is not None:
-            val_str = f"{col}: {val}"
-            # Append color info if available
-            if row_colors and i < len(row_colors) and row_colors[i]:
-                val_str += f" [Color: {row_colors[i]}]"
-            row_parts.append(f"- {val_str}")
 
-    row_repr = "\\n".join(row_parts)
+def _is_fatal(error: Exception) -> bool:
+    # Every following request would fail the same way, so the import stops
+    return isinstance(error, (openai.AuthenticationError, openai.PermissionDeniedError))
 
-    system_prompt = f"""You are a data parsing assistant for a videogame collection tracker.
-You will receive the column names and values from one row of an Excel spreadsheet.
-Your job is to extract the videogame information and return it as a JSON object.
 
-The JSON must follow this schema:
-{json.dumps(GAME_SCHEMA, indent=2)}
+def _retry_delay(error: Exception, attempt: int) -> float:
+    # Honour Retry-After when the server sends one, else full-jitter backoff
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), AI_BACKOFF_MAX)
+            except ValueError:
+                pass
+    return random.uniform(0, min(AI_BACKOFF_MAX, AI_BACKOFF_BASE * 2**attempt))
 
-Rules:
+
+async def _create_completion(client: AsyncOpenAI, **kwargs):
+    """chat.completions.create with rate limiting and retry on 429/5xx."""
+    attempt = 0
+    while True:
+        await rate_limiter.acquire()
+        try:
+            return await client.chat.completions.create(**kwargs)
+        except Exception as e:
+            if attempt >= AI_MAX_RETRIES or not _is_retryable(e):
+                raise
+            delay = _retry_delay(e, attempt)
+            logger.warning(f"AI request failed ({e}), retrying in {delay:.1f}s")
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+RULES = """Rules:
 - "title" is REQUIRED. Extract the game title from the row.
 - The "status" field MUST be set to "{status_choice}".
 - Only include fields you can confidently extract from the data. Leave out fields you cannot determine (do NOT invent data).
@@ -124,13 +247,69 @@ Rules:
 - For "steam_deck", return true/false boolean.
 - Return ONLY valid JSON, no markdown, no explanation."""
 
+
+def _cell_values(column_names: list[str], row_values: list, row_colors: list = None):
+    """Yields (column, "value [Color: X]") for the non-empty cells of a row."""
+    for i, (col, val) in enumerate(zip(column_names, row_values)):
+        if val is not None:
+            val_str = f"{val}"
+            # Append color info if available
+            if row_colors and i < len(row_colors) and row_colors[i]:
+                val_str += f" [Color: {row_colors[i]}]"
+            yield col, val_str
+
+
+def _system_prompt(status_choice: str, extra_instructions: str = None, batch=False):
+    if batch:
+        intro = """You are a data parsing assistant for a videogame collection tracker.
+You will receive a JSON array of rows from an Excel spreadsheet. Each item has a "row" index and a "data" object mapping column names to cell values.
+Your job is to extract the videogame information of every row.
+
+Return a JSON object of the form {"rows": [{"row": <row index>, "game": <game object>}]} with exactly one entry per input row, using the same row index.
+Each game object must follow this schema:"""
+    else:
+        intro = """You are a data parsing assistant for a videogame collection tracker.
+You will receive the column names and values from one row of an Excel spreadsheet.
+Your job is to extract the videogame information and return it as a JSON object.
+
+The JSON must follow this schema:"""
+
+    system_prompt = f"""{intro}
+{json.dumps(GAME_SCHEMA, indent=2)}
+
+{RULES.format(status_choice=status_choice)}"""
+
     if extra_instructions:
         system_prompt += f"\n\nUSER EXTRA INSTRUCTIONS:\n{extra_instructions}\n(Follow these instructions carefully when parsing the row)."
+    return system_prompt
+
+
+async def process_row_with_ai(
+    column_names: list[str],
+    row_values: list,
+    status_choice: str,
+    extra_instructions: str = None,
+    row_colors: list = None,
+) -> GameAIImport | None:
+    """
+    Sends one Excel row to Kimi K2.5 and returns a GameAIImport object.
+    status_choice is either 'backlog' or 'finished'.
+    row_colors: list of hex strings or None corresponding to row_values
+    """
+    client = get_client()
 
+    # Build the row representation
+    row_repr = "\n".join(
+        f"- {col}: {val}"
+        for col, val in _cell_values(column_names, row_values, row_colors)
+    )
+
+    system_prompt = _system_prompt(status_choice, extra_instructions)
     user_message = f"Here is the row data:\n{row_repr}"
 
     try:
-        response = await client.chat.completions.create(
+        response = await _create_completion(
+            client,
             model=KIMI_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -153,5 +332,215 @@ Rules:
         return GameAIImport(**data)
 
     except Exception as e:
+        if _is_fatal(e):
+            raise
         logger.error(f"AI processing error: {e}")
         return None
+
+
+def _estimate_tokens(text: str) -> int:
+    # Rough estimate (~4 characters per token), good enough for budgeting
+    return len(text) // 4 + 1
+
+
+async def process_batch_with_ai(
+    column_names: list[str],
+    batch: list[Tuple[Any, list, list]],
+    status_choice: str,
+    extra_instructions: str = None,
+) -> dict:
+    """
+    Sends several rows in one request and returns {key: GameAIImport | None}.
+    batch is a list of (key, row_values, row_colors).
+    When an answer arrives, rows missing from it or failing validation are
+    split in halves and retried; a single failing row falls back to
+    process_row_with_ai. If the request itself fails (after the retries in
+    _create_completion) the batch's rows get None, and authentication
+    errors are raised so the import stops.
+    """
+    if len(batch) == 1:
+        key, row_values, row_colors = batch[0]
+        return {
+            key: await process_row_with_ai(
+                column_names, row_values, status_choice, extra_instructions, row_colors
+            )
+        }
+
+    items = [
+        {"row": i, "data": dict(_cell_values(column_names, row_values, row_colors))}
+        for i, (_, row_values, row_colors) in enumerate(batch)
+    ]
+    user_message = "Here are the rows:\n" + json.dumps(
+        items, ensure_ascii=False, default=str
+    )
+
+    try:
+        response = await _create_completion(
+            get_client(),
+            model=KIMI_MODEL,
+            messages=[
+                {
+                    "role": "system",
+                    "content": _system_prompt(
+                        status_choice, extra_instructions, batch=True
+                    ),
+                },
+                {"role": "user", "content": user_message},
+            ],
+            temperature=1.0,
+            response_format={"type": "json_object"},
+        )
+    except Exception as e:
+        if _is_fatal(e):
+            raise
+        # Splitting would only repeat a request that already failed
+        logger.error(f"AI batch request failed: {e}")
+        return {key: None for key, _, _ in batch}
+
+    results = {}
+    try:
+        choice = response.choices[0]
+        if choice.finish_reason == "length":
+            raise ValueError("response truncated")
+
+        entries = json.loads(choice.message.content or "{}").get("rows") or []
+        for entry in entries:
+            try:
+                i = int(entry["row"])
+                data = entry.get("game")
+                if i in results or not 0 <= i < len(batch):
+                    continue
+                if data is None:
+                    # The model found no game in this row
+                    results[i] = None
+                    continue
+                # Force the status
+                data["status"] = status_choice
+                results[i] = GameAIImport(**data)
+            except Exception as e:
+                logger.warning(f"AI batch entry rejected: {e}")
+    except Exception as e:
+        logger.error(f"AI batch response unusable: {e}")
+    failed = [i for i in range(len(batch)) if i not in results]
+
+    out = {batch[i][0]: result for i, result in results.items()}
+    if failed:
+        # Split the failed part and retry each half on its own
+        retry = [batch[i] for i in failed]
+        half = (len(retry) + 1) // 2
+        for part in (retry[:half], retry[half:]):
+            if part:
+                out.update(
+                    await process_batch_with_ai(
+                        column_names, part, status_choice, extra_instructions
+                    )
+                )
+    return out
+
+
+async def process_rows_with_ai(
+    rows: Iterable[Tuple[Any, list, list, list]],
+    status_choice: str,
+    extra_instructions: str = None,
+    max_concurrency: int = AI_MAX_CONCURRENCY,
+) -> AsyncIterator[Tuple[Any, GameAIImport | None]]:
+    """
+    Runs the AI over many rows concurrently.
+    rows yields (key, column_names, row_values, row_colors) and is consumed
+    lazily. Rows already in the AI result cache are answered from it; the
+    rest are packed into multi-row requests of consecutive rows sharing
+    the same columns, capped by AI_MAX_BATCH_ROWS and an estimated
+    AI_BATCH_TOKEN_BUDGET (AI_MAX_BATCH_ROWS=1 sends one row per request).
+    Results are yielded as (key, result) in input order, so callers can
+    apply them deterministically. At most `max_concurrency` requests are
+    in flight and only a small window of rows is read ahead.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    cache = ai_cache.cache
+
+    async def run(batch):
+        async with semaphore:
+            results = await process_batch_with_ai(
+                batch["columns"], batch["rows"], status_choice, extra_instructions
+            )
+        if cache is not None:
+            for key, result in results.items():
+                if result is not None:
+                    await cache.put(batch["cache_keys"][key], result)
+        return results
+
+    # (key, batch, cached result); a batch is sent when it is full or when
+    # the consumer reaches one of its rows
+    window = deque()
+    open_batch = None
+
+    def launch(batch):
+        nonlocal open_batch
+        batch["task"] = asyncio.create_task(run(batch))
+        if batch is open_batch:
+            open_batch = None
+
+    async def next_result():
+        key, batch, result = window.popleft()
+        if batch is None:
+            return key, result
+        if batch["task"] is None:
+            launch(batch)
+        return key, (await batch["task"]).get(key)
+
+    max_window = max(1, max_concurrency) * max(1, AI_MAX_BATCH_ROWS) * 2
+    try:
+        for key, column_names, row_values, row_colors in rows:
+            cache_key = None
+            if cache is not None:
+                cache_key = ai_cache.make_key(
+                    KIMI_MODEL,
+                    PROMPT_VERSION,
+                    status_choice,
+                    extra_instructions,
+                    column_names,
+                    row_values,
+                    row_colors,
+                )
+                cached = await cache.get(cache_key)
+                if cached is not None:
+                    window.append((key, None, cached))
+                    continue
+
+            row_tokens = _estimate_tokens(
+                json.dumps(
+                    dict(_cell_values(column_names, row_values, row_colors)),
+                    ensure_ascii=False,
+                    default=str,
+                )
+            )
+            if open_batch is not None and (
+                column_names != open_batch["columns"]
+                or len(open_batch["rows"]) >= AI_MAX_BATCH_ROWS
+                or open_batch["tokens"] + row_tokens > AI_BATCH_TOKEN_BUDGET
+            ):
+                launch(open_batch)
+            if open_batch is None:
+                open_batch = {
+                    "columns": column_names,
+                    "rows": [],
+                    "cache_keys": {},
+                    "tokens": 0,
+                    "task": None,
+                }
+            open_batch["rows"].append((key, row_values, row_colors))
+            open_batch["cache_keys"][key] = cache_key
+            open_batch["tokens"] += row_tokens
+            window.append((key, open_batch, None))
+
+            if len(window) >= max_window:
+                yield await next_result()
+        while window:
+            yield await next_result()
+    finally:
+        # Caller stopped early (or failed): don't leave requests running
+        for _, batch, _ in window:
+            if batch is not None and batch["task"] is not None:
+                batch["task"].cancel()
+        if cache is not None:
+            await cache.evict()
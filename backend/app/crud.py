@@ -1,7 +1,27 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import delete
-from . import models, schemas
+from sqlalchemy import (
+    delete,
+    insert,
+    update,
+    literal,
+    literal_column,
+    func,
+    table,
+    column,
+    or_,
+    and_,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Dict, List, Optional, Tuple, Union
+from datetime import datetime, timedelta, timezone
+import base64
+import json
+import os
+import re
+from . import models, schemas, user_cache
+
 # auth import moved to function level to avoid circular dependency
 
 
@@ -21,16 +41,28 @@ async def create_user(
     db: AsyncSession, user: schemas.UserCreate, is_admin: bool = False
 ):
     from .auth import (
-        get_password_hash,
+        get_password_hash_async,
     )  # Import here to avoid circular dependency at module level if auth imports crud
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = models.User(
         username=user.username, password_hash=hashed_password, is_admin=is_admin
     )
     db.add(db_user)
     await db.commit()
     await db.refresh(db_user)
+    # Drop any stale principal cached under the same username
+    await user_cache.invalidate(db_user.username)
+    return db_user
+
+
+async def update_user_password_hash(
+    db: AsyncSession, db_user: models.User, password_hash: str
+):
+    db_user.password_hash = password_hash
+    db.add(db_user)
+    await db.commit()
+    await user_cache.invalidate(db_user.username)
     return db_user
 
 
@@ -42,6 +74,212 @@ async def get_games(db: AsyncSession, user_id: int, status: str = None):
     return result.scalars().all()
 
 
+# Columns the listing endpoint can project and sort on
+GAME_FIELDS = list(schemas.Game.model_fields.keys())
+GAME_SORT_KEYS = [
+    "id",
+    "title",
+    "hype_score",
+    "rating",
+    "playtime_hours",
+    "finish_year",
+    "release_year",
+    "price",
+]
+
+
+def encode_cursor(sort_value, game_id: int) -> str:
+    raw = json.dumps([sort_value, game_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str):
+    """Returns (sort_value, id). Raises ValueError on a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii"))
+        sort_value, game_id = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if type(game_id) is not int:
+        raise ValueError("Invalid cursor")
+    return sort_value, game_id
+
+
+def encode_page_cursor(sort: str, descending: bool, sort_value, game_id: int) -> str:
+    """A listing cursor, tied to the sort key and order it was built for."""
+    order = "desc" if descending else "asc"
+    return encode_cursor([sort, order, sort_value], game_id)
+
+
+def decode_page_cursor(cursor: str, sort: str, descending: bool):
+    """
+    Returns (sort_value, id). Raises ValueError if the cursor is malformed,
+    was built for another sort key or order, or its value doesn't fit the
+    sort column's type.
+    """
+    key, game_id = decode_cursor(cursor)
+    order = "desc" if descending else "asc"
+    if not isinstance(key, list) or len(key) != 3 or key[:2] != [sort, order]:
+        raise ValueError("Cursor doesn't match the requested sort")
+    value = key[2]
+    if value is None:
+        if sort == "id":
+            raise ValueError("Invalid cursor")
+        return None, game_id
+    expected = getattr(models.Game, sort).type.python_type
+    # JSON writes 5.0 as 5, so integers are fine for float columns
+    if expected is float and type(value) is int:
+        value = float(value)
+    if type(value) is not expected:
+        raise ValueError("Invalid cursor")
+    return value, game_id
+
+
+async def get_games_page(
+    db: AsyncSession,
+    user_id: int,
+    status: str = None,
+    fields: Optional[List[str]] = None,
+    sort: str = "id",
+    descending: bool = False,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> Tuple[list, Optional[str]]:
+    """
+    Keyset-paginated listing of a user's games.
+    Only the requested `fields` are selected (id and the sort key are always
+    included so the next cursor can be built). NULL sort values go last in
+    both directions, with id as the tie-breaker.
+    Returns (rows as dicts, next cursor or None).
+    """
+    sort_col = getattr(models.Game, sort)
+    id_col = models.Game.id
+
+    selected = list(dict.fromkeys(["id", sort] + (fields or GAME_FIELDS)))
+    query = select(*[getattr(models.Game, f) for f in selected]).where(
+        models.Game.user_id == user_id
+    )
+    if status:
+        query = query.where(models.Game.status == status)
+
+    if cursor:
+        last_value, last_id = decode_page_cursor(cursor, sort, descending)
+        id_after = id_col < last_id if descending else id_col > last_id
+        if sort == "id":
+            query = query.where(id_after)
+        elif last_value is None:
+            query = query.where(sort_col.is_(None), id_after)
+        else:
+            value_after = sort_col < last_value if descending else sort_col > last_value
+            query = query.where(
+                or_(
+                    value_after,
+                    and_(sort_col == last_value, id_after),
+                    sort_col.is_(None),
+                )
+            )
+
+    if sort == "id":
+        query = query.order_by(id_col.desc() if descending else id_col.asc())
+    else:
+        query = query.order_by(
+            sort_col.is_(None),
+            sort_col.desc() if descending else sort_col.asc(),
+            id_col.desc() if descending else id_col.asc(),
+        )
+
+    if limit:
+        # Fetch one extra row to know whether another page exists
+        query = query.limit(limit + 1)
+
+    result = await db.execute(query)
+    rows = [dict(r._mapping) for r in result.all()]
+
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_page_cursor(sort, descending, last[sort], last["id"])
+
+    if fields:
+        rows = [
+            {k: row[k] for k in selected if k in fields or k == "id"} for row in rows
+        ]
+
+    return rows, next_cursor
+
+
+def _search_terms(q: str) -> List[str]:
+    return re.findall(r"\w+", q.lower())
+
+
+async def search_games(
+    db: AsyncSession,
+    user_id: int,
+    q: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> Tuple[list, Optional[str]]:
+    """
+    Ranked search over title and notes; every word matches as a prefix.
+    SQLite uses the games_fts FTS5 table (bm25, titles weighted over notes);
+    Postgres uses the tsvector index, falling back to trigram similarity on
+    the title for typos. Returns (games, next cursor or None).
+    """
+    terms = _search_terms(q)
+    if not terms:
+        return [], None
+
+    if db.bind.dialect.name == "postgresql":
+        vector = literal_column(models.SEARCH_VECTOR)
+        ts_query = func.to_tsquery(
+            literal_column("'simple'"), " & ".join(f"{t}:*" for t in terms)
+        )
+        text_query = " ".join(terms)
+        score = func.ts_rank(vector, ts_query) + func.similarity(
+            models.Game.title, text_query
+        )
+        matches = or_(vector.op("@@")(ts_query), models.Game.title.op("%")(text_query))
+        ranked = select(models.Game.id, score.label("score")).where(
+            models.Game.user_id == user_id, matches
+        )
+    else:
+        fts = table("games_fts", column("rowid"))
+        fts_name = literal_column("games_fts")
+        match = " ".join(f'"{t}"*' for t in terms)
+        # bm25 is lower-is-better; negate so both dialects sort descending
+        score = -func.bm25(fts_name, 10.0, 1.0)
+        ranked = (
+            select(models.Game.id, score.label("score"))
+            .select_from(models.Game)
+            .join(fts, fts.c.rowid == models.Game.id)
+            .where(models.Game.user_id == user_id, fts_name.op("MATCH")(match))
+        )
+
+    ranked = ranked.subquery()
+    query = select(models.Game, ranked.c.score).join(
+        ranked, models.Game.id == ranked.c.id
+    )
+    if cursor:
+        last_score, last_id = decode_cursor(cursor)
+        if type(last_score) not in (int, float):
+            raise ValueError("Invalid cursor")
+        query = query.where(
+            or_(
+                ranked.c.score < last_score,
+                and_(ranked.c.score == last_score, ranked.c.id > last_id),
+            )
+        )
+    query = query.order_by(ranked.c.score.desc(), ranked.c.id).limit(limit + 1)
+    hits = (await db.execute(query)).all()
+
+    next_cursor = None
+    if len(hits) > limit:
+        hits = hits[:limit]
+        next_cursor = encode_cursor(hits[-1].score, hits[-1].Game.id)
+    return [hit.Game for hit in hits], next_cursor
+
+
 async def get_game(db: AsyncSession, game_id: int, user_id: int):
     result = await db.execute(
         select(models.Game).where(
@@ -51,9 +289,137 @@ async def get_game(db: AsyncSession, game_id: int, user_id: int):
     return result.scalars().first()
 
 
+async def get_library_version(db: AsyncSession, user_id: int) -> int:
+    result = await db.execute(
+        select(models.User.library_version).where(models.User.id == user_id)
+    )
+    return result.scalar() or 0
+
+
+async def bump_library_version(db: AsyncSession, user_id: int):
+    """Marks the user's games as changed, in the caller's transaction."""
+    await db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(library_version=models.User.library_version + 1)
+    )
+
+
+# Library statistics, maintained incrementally in library_stats
+
+STATS_DIMENSIONS = ("status", "platform", "finish_year", "progress")
+StatsDeltas = Dict[Tuple[str, str], List[float]]
+
+
+def _stats_bucket(dimension: str, value) -> str:
+    if value is None:
+        return ""
+    if dimension == "status":
+        return models.GameStatus(value).name
+    if dimension == "progress":
+        return models.GameProgress(value).name
+    return str(value)
+
+
+def add_game_stats(deltas: StatsDeltas, game: models.Game, sign: int):
+    """Adds (sign=1) or removes (sign=-1) a game's current values."""
+    rated = game.rating is not None
+    values = (
+        sign,
+        sign * (game.rating or 0),
+        sign if rated else 0,
+        sign * (game.playtime_hours or 0),
+        sign * (game.price or 0),
+    )
+    keys = [("all", "")] + [
+        (dim, _stats_bucket(dim, getattr(game, dim))) for dim in STATS_DIMENSIONS
+    ]
+    for key in keys:
+        totals = deltas.setdefault(key, [0, 0.0, 0, 0.0, 0.0])
+        for i, value in enumerate(values):
+            totals[i] += value
+
+
+async def apply_stats(db: AsyncSession, user_id: int, deltas: StatsDeltas):
+    """Adds the deltas to the user's stats rows in the caller's transaction."""
+    rows = [
+        {
+            "user_id": user_id,
+            "dimension": dimension,
+            "bucket": bucket,
+            "games": totals[0],
+            "rating_sum": totals[1],
+            "rating_count": totals[2],
+            "playtime_sum": totals[3],
+            "price_sum": totals[4],
+        }
+        for (dimension, bucket), totals in deltas.items()
+        if any(totals)
+    ]
+    if not rows:
+        return
+    if db.bind.dialect.name == "postgresql":
+        stmt = pg_insert(models.LibraryStat)
+    else:
+        stmt = sqlite_insert(models.LibraryStat)
+    stat = models.LibraryStat
+    stmt = stmt.values(rows).on_conflict_do_update(
+        index_elements=["user_id", "dimension", "bucket"],
+        set_={
+            "games": stat.games + stmt.excluded.games,
+            "rating_sum": stat.rating_sum + stmt.excluded.rating_sum,
+            "rating_count": stat.rating_count + stmt.excluded.rating_count,
+            "playtime_sum": stat.playtime_sum + stmt.excluded.playtime_sum,
+            "price_sum": stat.price_sum + stmt.excluded.price_sum,
+        },
+    )
+    await db.execute(stmt)
+
+
+async def get_library_stats(db: AsyncSession, user_id: int) -> dict:
+    result = await db.execute(
+        select(models.LibraryStat).where(
+            models.LibraryStat.user_id == user_id, models.LibraryStat.games > 0
+        )
+    )
+    stats = {
+        "total_games": 0,
+        "by_status": [],
+        "by_platform": [],
+        "by_finish_year": [],
+        "by_progress": [],
+        "average_rating": None,
+        "total_playtime_hours": 0.0,
+        "total_spend": 0.0,
+    }
+    for row in result.scalars().all():
+        if row.dimension == "all":
+            stats["total_games"] = row.games
+            if row.rating_count:
+                stats["average_rating"] = round(row.rating_sum / row.rating_count, 2)
+            stats["total_playtime_hours"] = round(row.playtime_sum, 2)
+            stats["total_spend"] = round(row.price_sum, 2)
+            continue
+        value = row.bucket or None
+        if value and row.dimension == "status":
+            value = models.GameStatus[value].value
+        elif value and row.dimension == "progress":
+            value = models.GameProgress[value].value
+        elif value and row.dimension == "finish_year":
+            value = int(value)
+        stats[f"by_{row.dimension}"].append({"value": value, "games": row.games})
+    for dimension in STATS_DIMENSIONS:
+        stats[f"by_{dimension}"].sort(key=lambda b: -b["games"])
+    return stats
+
+
 async def create_user_game(db: AsyncSession, game: schemas.GameCreate, user_id: int):
     db_game = models.Game(**game.model_dump(), user_id=user_id)
     db.add(db_game)
+    deltas: StatsDeltas = {}
+    add_game_stats(deltas, db_game, 1)
+    await apply_stats(db, user_id, deltas)
+    await bump_library_version(db, user_id)
     await db.commit()
     await db.refresh(db_game)
     return db_game
@@ -67,11 +433,16 @@ async def update_game(
     if not db_game:
         return None
 
+    deltas: StatsDeltas = {}
+    add_game_stats(deltas, db_game, -1)
     update_data = game_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_game, key, value)
+    add_game_stats(deltas, db_game, 1)
 
     db.add(db_game)
+    await apply_stats(db, user_id, deltas)
+    await bump_library_version(db, user_id)
     await db.commit()
     await db.refresh(db_game)
     return db_game
@@ -82,11 +453,322 @@ async def delete_game(db: AsyncSession, game_id: int, user_id: int):
     if not db_game:
         return None
     await db.delete(db_game)
+    db.add(models.GameTombstone(game_id=game_id, user_id=user_id))
+    deltas: StatsDeltas = {}
+    add_game_stats(deltas, db_game, -1)
+    await apply_stats(db, user_id, deltas)
+    await bump_library_version(db, user_id)
     await db.commit()
     return db_game
 
 
 async def delete_user_games(db: AsyncSession, user_id: int):
+    # Leave a tombstone per game for clients doing delta sync
+    await db.execute(
+        insert(models.GameTombstone).from_select(
+            ["game_id", "user_id", "deleted_at"],
+            select(
+                models.Game.id,
+                models.Game.user_id,
+                literal(models.utcnow(), type_=models.GameTombstone.deleted_at.type),
+            ).where(models.Game.user_id == user_id),
+        )
+    )
     # Pass execution_options={"synchronize_session": False} if not needing session update
     await db.execute(delete(models.Game).where(models.Game.user_id == user_id))
+    await db.execute(
+        delete(models.LibraryStat).where(models.LibraryStat.user_id == user_id)
+    )
+    await bump_library_version(db, user_id)
+    await db.commit()
+
+
+# Writes committed less than this long before a sync may still be invisible
+# to it, so the returned cursor trails the sync by this much
+SYNC_OVERLAP = timedelta(seconds=float(os.getenv("SYNC_OVERLAP_SECONDS", "5")))
+
+
+def encode_sync_cursor(timestamp: datetime, game_id: int = 0) -> str:
+    return encode_cursor(timestamp.isoformat(), game_id)
+
+
+def decode_sync_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Returns (timestamp, id). Raises ValueError on a malformed cursor."""
+    timestamp, game_id = decode_cursor(cursor)
+    try:
+        timestamp = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    return _as_utc(timestamp), game_id
+
+
+def _as_utc(timestamp: datetime) -> datetime:
+    # SQLite hands timestamps back without a timezone; they are stored in UTC
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.astimezone(timezone.utc)
+
+
+async def get_game_changes(
+    db: AsyncSession,
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 500,
+) -> Tuple[List[models.Game], List[int], str, bool]:
+    """
+    Games updated and ids deleted since `cursor` (everything when None),
+    oldest change first. Returns (games, deleted ids, next cursor, has_more).
+    Changes near the end of the window may be sent again on the next call;
+    clients should apply them idempotently.
+    """
+    sync_started = models.utcnow()
+    since, since_id = decode_sync_cursor(cursor) if cursor else (None, 0)
+
+    query = select(models.Game).where(models.Game.user_id == user_id)
+    if since is not None:
+        query = query.where(
+            or_(
+                models.Game.updated_at > since,
+                and_(models.Game.updated_at == since, models.Game.id > since_id),
+            )
+        )
+    query = query.order_by(models.Game.updated_at, models.Game.id).limit(limit + 1)
+    games = list((await db.execute(query)).scalars().all())
+
+    has_more = len(games) > limit
+    if has_more:
+        games = games[:limit]
+        last = games[-1]
+        next_cursor = encode_sync_cursor(_as_utc(last.updated_at), last.id)
+    else:
+        next_cursor = encode_sync_cursor(sync_started - SYNC_OVERLAP)
+
+    deleted = []
+    if since is not None:
+        result = await db.execute(
+            select(models.GameTombstone.game_id).where(
+                models.GameTombstone.user_id == user_id,
+                models.GameTombstone.deleted_at > since,
+            )
+        )
+        # Ids can be reused by SQLite once the newest game is deleted
+        live = {game.id for game in games}
+        deleted = [
+            game_id
+            for game_id in dict.fromkeys(result.scalars().all())
+            if game_id not in live
+        ]
+
+    return games, deleted, next_cursor, has_more
+
+
+async def apply_game_batch(
+    db: AsyncSession,
+    user_id: int,
+    operations: List[
+        Tuple[
+            str, Optional[int], Optional[Union[schemas.GameCreate, schemas.GameUpdate]]
+        ]
+    ],
+) -> List[dict]:
+    """
+    Applies mixed creates/updates/deletes in a single transaction.
+    Each operation is (action, game_id, payload) with action "create"
+    (game_id None), "update" or "delete" (payload None). Target games are
+    loaded with one SELECT and the unit of work then emits batched
+    multi-row INSERTs, executemany UPDATEs and DELETEs.
+    Returns one outcome per operation, in order:
+    { "action": "created" | "updated" | "deleted" | "not_found",
+      "game": Game | None }
+    """
+    ids = {game_id for _, game_id, _ in operations if game_id is not None}
+    existing = {}
+    if ids:
+        result = await db.execute(
+            select(models.Game).where(
+                models.Game.user_id == user_id, models.Game.id.in_(ids)
+            )
+        )
+        existing = {g.id: g for g in result.scalars().all()}
+
+    outcomes = []
+    deltas: StatsDeltas = {}
+    for action, game_id, payload in operations:
+        if action == "create":
+            db_game = models.Game(**payload.model_dump(), user_id=user_id)
+            db.add(db_game)
+            add_game_stats(deltas, db_game, 1)
+            outcomes.append({"action": "created", "game": db_game})
+            continue
+
+        db_game = existing.get(game_id)
+        if db_game is None:
+            outcomes.append({"action": "not_found", "game": None})
+            continue
+        if action == "delete":
+            # Later operations on the same id see it as gone
+            del existing[game_id]
+            await db.delete(db_game)
+            db.add(models.GameTombstone(game_id=game_id, user_id=user_id))
+            add_game_stats(deltas, db_game, -1)
+            outcomes.append({"action": "deleted", "game": db_game})
+            continue
+        add_game_stats(deltas, db_game, -1)
+        for key, value in payload.model_dump(exclude_unset=True).items():
+            setattr(db_game, key, value)
+        add_game_stats(deltas, db_game, 1)
+        outcomes.append({"action": "updated", "game": db_game})
+
+    try:
+        if any(o["action"] != "not_found" for o in outcomes):
+            await apply_stats(db, user_id, deltas)
+            await bump_library_version(db, user_id)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return outcomes
+
+
+async def bulk_upsert_games(
+    db: AsyncSession,
+    user_id: int,
+    items: List[Tuple[Optional[int], Union[schemas.GameCreate, schemas.GameUpdate]]],
+) -> List[dict]:
+    """
+    Applies many creates/updates in a single transaction.
+    Each item is (game_id, payload): game_id None means create.
+    Returns one outcome per item, as apply_game_batch does.
+    """
+    return await apply_game_batch(
+        db,
+        user_id,
+        [
+            ("create" if game_id is None else "update", game_id, payload)
+            for game_id, payload in items
+        ],
+    )
+
+
+# Background import jobs
+
+
+async def create_import_job(
+    db: AsyncSession,
+    job_id: str,
+    user_id: int,
+    kind: str,
+    total: Optional[int] = None,
+    owner: Optional[str] = None,
+):
+    db_job = models.ImportJob(
+        id=job_id,
+        user_id=user_id,
+        kind=kind,
+        status=models.JobStatus.QUEUED,
+        processed=0,
+        total=total,
+        owner=owner,
+        updated_at=models.utcnow(),
+    )
+    db.add(db_job)
+    await db.commit()
+    await db.refresh(db_job)
+    return db_job
+
+
+async def get_import_job(db: AsyncSession, job_id: str, user_id: Optional[int] = None):
+    query = select(models.ImportJob).where(models.ImportJob.id == job_id)
+    if user_id is not None:
+        query = query.where(models.ImportJob.user_id == user_id)
+    result = await db.execute(query)
+    return result.scalars().first()
+
+
+async def update_import_job(db: AsyncSession, job_id: str, **fields):
+    await db.execute(
+        update(models.ImportJob).where(models.ImportJob.id == job_id).values(**fields)
+    )
+    await db.commit()
+
+
+async def request_import_job_cancel(db: AsyncSession, job_id: str) -> None:
+    """Flags the job so its owning process cancels it."""
+    await update_import_job(db, job_id, cancel_requested=True)
+
+
+async def is_import_job_cancel_requested(db: AsyncSession, job_id: str) -> bool:
+    result = await db.execute(
+        select(models.ImportJob.cancel_requested).where(models.ImportJob.id == job_id)
+    )
+    return bool(result.scalar_one_or_none())
+
+
+async def touch_import_jobs(db: AsyncSession, owner: str) -> None:
+    """Heartbeat: marks the owner's unfinished jobs as still alive."""
+    await db.execute(
+        update(models.ImportJob)
+        .where(
+            models.ImportJob.owner == owner,
+            models.ImportJob.status.in_(
+                [models.JobStatus.QUEUED, models.JobStatus.RUNNING]
+            ),
+        )
+        .values(updated_at=models.utcnow())
+    )
+    await db.commit()
+
+
+async def fail_interrupted_jobs(db: AsyncSession, stale_before: datetime) -> int:
+    """
+    Marks jobs left queued or running by a process that stopped sending
+    heartbeats (nothing touched them since `stale_before`) as failed.
+    Jobs of live processes are left alone. Returns how many were updated.
+    """
+    result = await db.execute(
+        update(models.ImportJob)
+        .where(
+            models.ImportJob.status.in_(
+                [models.JobStatus.QUEUED, models.JobStatus.RUNNING]
+            ),
+            models.ImportJob.updated_at < stale_before,
+        )
+        .values(status=models.JobStatus.FAILED, error="Interrupted by a restart")
+    )
+    await db.commit()
+    return result.rowcount
+
+
+# Learned import header mappings
+
+
+async def get_header_mappings(db: AsyncSession, user_id: int) -> Dict[str, str]:
+    result = await db.execute(
+        select(models.HeaderMapping).where(models.HeaderMapping.user_id == user_id)
+    )
+    return {m.db_column: m.header for m in result.scalars().all()}
+
+
+async def save_header_mappings(
+    db: AsyncSession, user_id: int, column_mapping: Dict[str, Optional[str]]
+):
+    """
+    Remembers the headers the user confirmed for each DB column. Columns
+    mapped to nothing forget their previous header.
+    """
+    if not column_mapping:
+        return
+    await db.execute(
+        delete(models.HeaderMapping).where(
+            models.HeaderMapping.user_id == user_id,
+            models.HeaderMapping.db_column.in_(list(column_mapping)),
+        )
+    )
+    for db_column, header in column_mapping.items():
+        if header:
+            db.add(
+                models.HeaderMapping(
+                    user_id=user_id, db_column=db_column, header=header
+                )
+            )
     await db.commit()
@@ -1,11 +1,75 @@
+import asyncio
+import os
+from sqlalchemy import event, inspect
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-import os
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from . import observability
+
+
+class DatabaseSettings(BaseSettings):
+    """Engine configuration, read from the environment (or .env)."""
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    # Fallback to SQLite because user environment might not have Postgres/Docker running
+    database_url: str = "sqlite+aiosqlite:///./videogames.db"
+    # Log every SQL statement
+    db_echo: bool = False
+
+    # Connection pool (Postgres)
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+
+    # PRAGMAs applied to every SQLite connection
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 64 * 1024 * 1024
+
+    # Run `alembic upgrade head` at startup. Turn off when migrations are
+    # applied by a separate deploy step (e.g. several app replicas)
+    db_auto_migrate: bool = True
+
+
+settings = DatabaseSettings()
+
+DATABASE_URL = settings.database_url
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./videogames.db")
-# Fallback to SQLite because user environment might not have Postgres/Docker running
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+def _engine_options(settings: DatabaseSettings) -> dict:
+    options = {"echo": settings.db_echo}
+    if not IS_SQLITE:
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=settings.db_pool_pre_ping,
+        )
+    return options
+
+
+engine = create_async_engine(DATABASE_URL, **_engine_options(settings))
+observability.instrument_engine(engine.sync_engine)
+
+
+if IS_SQLITE:
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL lets readers run while a write is in progress
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+        cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+        cursor.close()
+
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -18,9 +82,37 @@ AsyncSessionLocal = sessionmaker(
 Base = declarative_base()
 
 
+ALEMBIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "alembic")
+# Revision matching the schema of databases created before Alembic
+BASELINE_REVISION = "0001"
+
+
+def _alembic_config():
+    from alembic.config import Config
+
+    # No ini file, so alembic leaves the app's logging configuration alone
+    config = Config()
+    config.set_main_option("script_location", ALEMBIC_DIR)
+    return config
+
+
 async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    """
+    Brings the schema up to date with the Alembic migrations, which own it.
+    A database created before migrations existed (tables but no
+    alembic_version) is stamped at the baseline revision first.
+    """
+    if not settings.db_auto_migrate:
+        return
+    from alembic import command
+
+    async with engine.connect() as conn:
+        tables = await conn.run_sync(lambda c: inspect(c).get_table_names())
+    config = _alembic_config()
+    # env.py runs its own event loop, so migrations go to a worker thread
+    if "games" in tables and "alembic_version" not in tables:
+        await asyncio.to_thread(command.stamp, config, BASELINE_REVISION)
+    await asyncio.to_thread(command.upgrade, config, "head")
 
 
 async def get_db():
@@ -0,0 +1,152 @@
+import os
+import time
+import uuid
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+IMPORT_SESSION_TTL_SECONDS = float(os.getenv("IMPORT_SESSION_TTL_SECONDS", "3600"))
+# Live sessions per user; a new one replaces that user's oldest
+IMPORT_SESSION_MAX_PER_USER = int(os.getenv("IMPORT_SESSION_MAX_PER_USER", "4"))
+# Memory backstop across all users
+IMPORT_SESSION_MAX = int(os.getenv("IMPORT_SESSION_MAX", "128"))
+
+
+class SheetColumns:
+    """
+    A parsed sheet kept column by column: one list of values per header,
+    plus a list of colours only for columns where some cell has a fill.
+    """
+
+    def __init__(self, headers: List[str]):
+        self.headers = headers
+        self.values: Dict[str, List[Any]] = {h: [] for h in headers}
+        self.colors: Dict[str, List[Optional[str]]] = {}
+        self.row_count = 0
+
+    @classmethod
+    def from_records(
+        cls, headers: List[str], records: Iterable[Dict[str, Any]]
+    ) -> "SheetColumns":
+        sheet = cls(headers)
+        for record in records:
+            sheet.append(record)
+        return sheet
+
+    @classmethod
+    def from_cells(cls, rows: List[Dict[str, Any]]) -> "SheetColumns":
+        """
+        Builds columns from client-sent rows, whose cells may be
+        { "v", "c" } dicts or bare values and whose keys may vary by row.
+        """
+        headers = list(dict.fromkeys(h for row in rows for h in row))
+        sheet = cls(headers)
+        for header in headers:
+            cells = [row.get(header) for row in rows]
+            sheet.values[header] = [
+                cell.get("v") if isinstance(cell, dict) else cell for cell in cells
+            ]
+            colors = [
+                cell.get("c") if isinstance(cell, dict) else None for cell in cells
+            ]
+            if any(color is not None for color in colors):
+                sheet.colors[header] = colors
+        sheet.row_count = len(rows)
+        return sheet
+
+    def append(self, record: Dict[str, Any]):
+        for header in self.headers:
+            cell = record.get(header) or {}
+            self.values[header].append(cell.get("v"))
+            color = cell.get("c")
+            if color is not None and header not in self.colors:
+                self.colors[header] = [None] * self.row_count
+            if header in self.colors:
+                self.colors[header].append(color)
+        self.row_count += 1
+
+    def color_column(self, header: str) -> List[Optional[str]]:
+        return self.colors.get(header) or [None] * self.row_count
+
+    def iter_records(self, offset: int = 0, limit: Optional[int] = None) -> Iterator:
+        """Rebuilds records in the { "Header": { "v", "c" } } shape."""
+        end = self.row_count if limit is None else min(self.row_count, offset + limit)
+        for i in range(offset, end):
+            yield {
+                h: {
+                    "v": self.values[h][i],
+                    "c": self.colors[h][i] if h in self.colors else None,
+                }
+                for h in self.headers
+            }
+
+    def value_counts(self, header: str) -> List[Dict[str, Any]]:
+        """Distinct values and colours of a column with their frequency."""
+        counts = Counter()
+        for val in self.values.get(header, ()):
+            if val is not None and val != "":
+                counts[("value", str(val))] += 1
+        for color in self.colors.get(header, ()):
+            if color is not None:
+                counts[("color", color)] += 1
+        return [
+            {"type": kind, "val": val, "count": count}
+            for (kind, val), count in counts.most_common()
+        ]
+
+
+class ImportSession:
+    def __init__(self, user_id: int, sheets: Dict[str, SheetColumns]):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.sheets = sheets
+        self.expires_at = time.monotonic() + IMPORT_SESSION_TTL_SECONDS
+
+
+# In-process store; sessions live until their TTL or until deleted
+_sessions: Dict[str, ImportSession] = {}
+
+
+def _purge():
+    now = time.monotonic()
+    for session_id in [k for k, s in _sessions.items() if s.expires_at < now]:
+        del _sessions[session_id]
+
+
+def _drop_oldest(sessions: List[ImportSession]):
+    oldest = min(sessions, key=lambda s: s.expires_at)
+    del _sessions[oldest.id]
+
+
+def create_session(user_id: int, sheets: Dict[str, SheetColumns]) -> ImportSession:
+    _purge()
+    # A user only ever displaces their own sessions
+    while True:
+        own = [s for s in _sessions.values() if s.user_id == user_id]
+        if len(own) < IMPORT_SESSION_MAX_PER_USER:
+            break
+        _drop_oldest(own)
+    # When the store is still full, the oldest session among the users
+    # holding the most is dropped
+    while len(_sessions) >= IMPORT_SESSION_MAX:
+        per_user = Counter(s.user_id for s in _sessions.values())
+        most = max(per_user.values())
+        _drop_oldest([s for s in _sessions.values() if per_user[s.user_id] == most])
+    session = ImportSession(user_id, sheets)
+    _sessions[session.id] = session
+    return session
+
+
+def get_session(session_id: str, user_id: int) -> Optional[ImportSession]:
+    _purge()
+    session = _sessions.get(session_id)
+    if session is None or session.user_id != user_id:
+        return None
+    return session
+
+
+def delete_session(session_id: str, user_id: int) -> bool:
+    session = get_session(session_id, user_id)
+    if session is None:
+        return False
+    del _sessions[session_id]
+    return True
@@ -1,8 +1,13 @@
-from io import BytesIO
-from thefuzz import process
+from io import BytesIO, TextIOWrapper
+from collections import Counter
+import csv
+import os
+from functools import lru_cache
+from thefuzz import fuzz, utils
 from .models import Game
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union, Tuple, Iterator, BinaryIO
 import openpyxl
+import aiohttp
 
 # Map internal DB columns to potential human-readable headers (Spanish/English)
 COLUMN_MAPPING_TARGETS = {
@@ -21,67 +26,397 @@ COLUMN_MAPPING_TARGETS = {
 }
 
 
-def parse_excel_file(file_content: bytes) -> Dict[str, List[Dict[str, Any]]]:
+def _load_workbook(source: Union[bytes, str, BinaryIO]):
     """
-    Parses an Excel file using openpyxl to extract values AND background colors.
-    Returns a dict where keys are sheet names and values are list of records.
-    Each record is: { "Header": { "v": value, "c": "FFFFFF" } }
+    Opens a workbook in read-only (streaming) mode, falling back to the
+    normal loader for files the streaming reader can't handle.
+    source can be the file bytes, a path or a binary file object.
     """
-    wb = openpyxl.load_workbook(BytesIO(file_content), data_only=True)
-    result = {}
-    for sheet_name in wb.sheetnames:
-        ws = wb[sheet_name]
-        rows = list(ws.iter_rows())
-        if not rows:
-            continue
-
-        # Get headers from first row
-        headers = []
-        for cell in rows[0]:
-            h_val = (
-                str(cell.value).strip()
-                if cell.value is not None
-                else f"Unnamed:{cell.column}"
-            )
-            headers.append(h_val)
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    try:
+        return openpyxl.load_workbook(source, read_only=True, data_only=True)
+    except Exception:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return openpyxl.load_workbook(source, data_only=True)
+
+
+def _cell_color(cell) -> Optional[str]:
+    # Empty cells in read-only mode have no fill
+    fill = getattr(cell, "fill", None)
+    if fill and fill.patternType == "solid":
+        raw_color = fill.start_color
+        if raw_color.type == "rgb":
+            # ARGB hex string
+            if raw_color.rgb and len(raw_color.rgb) >= 6:
+                # Keep last 6 chars (RGB)
+                return raw_color.rgb[-6:]
+        # Note: Theme colors are complex to resolve, skipping for now
+        # user likely uses standard colors if they color-code manually
+    return None
+
+
+def read_sheet(
+    ws, max_rows: Optional[int] = None, columns: Optional[List[str]] = None
+) -> Tuple[List[str], Iterator[Dict[str, Any]]]:
+    """
+    Reads the header row of a worksheet and returns (headers, records),
+    where records lazily yields one record per non-empty data row:
+    { "Header": { "v": value, "c": "FFFFFF" } }
+    max_rows stops after that many records; columns restricts records to
+    those headers (unknown ones are ignored).
+    """
+    rows = ws.iter_rows()
+    first = next(rows, None)
+    if first is None:
+        return [], iter(())
+
+    # Get headers from first row
+    headers = []
+    for i, cell in enumerate(first, start=1):
+        h_val = str(cell.value).strip() if cell.value is not None else f"Unnamed:{i}"
+        headers.append(h_val)
+
+    selected = [
+        (i, header)
+        for i, header in enumerate(headers)
+        if columns is None or header in columns
+    ]
+
+    def records():
+        count = 0
+        for row in rows:
+            if max_rows is not None and count >= max_rows:
+                break
 
-        records = []
-        for row in rows[1:]:
             # Skip empty rows
             if all(cell.value is None for cell in row):
                 continue
 
             row_data = {}
-            for i, cell in enumerate(row):
-                if i >= len(headers):
-                    break
+            for i, header in selected:
+                # Streamed rows may be shorter than the header row
+                cell = row[i] if i < len(row) else None
+                row_data[header] = {
+                    "v": cell.value if cell is not None else None,
+                    "c": _cell_color(cell),
+                }
+            count += 1
+            yield row_data
+
+    return headers, records()
 
-                val = cell.value
 
-                # Extract Color
-                color = None
-                if cell.fill and cell.fill.patternType == "solid":
-                    raw_color = cell.fill.start_color
-                    if raw_color.type == "rgb":
-                        # ARGB hex string
-                        if raw_color.rgb and len(raw_color.rgb) >= 6:
-                            # Keep last 6 chars (RGB)
-                            color = raw_color.rgb[-6:]
-                    # Note: Theme colors are complex to resolve, skipping for now
-                    # user likely uses standard colors if they color-code manually
+def iter_excel_sheets(
+    source: Union[bytes, BinaryIO],
+    sheets: Optional[List[str]] = None,
+    max_rows: Optional[int] = None,
+    columns: Optional[List[str]] = None,
+) -> Iterator[Tuple[str, List[str], Iterator[Dict[str, Any]]]]:
+    """
+    Streams a workbook sheet by sheet, yielding (sheet_name, headers, records).
+    Only the sheets named in `sheets` are read (all by default); max_rows
+    and columns are applied to each sheet as in read_sheet.
+    Each sheet's records must be consumed before moving to the next sheet.
+    """
+    wb = _load_workbook(source)
+    try:
+        for sheet_name in wb.sheetnames:
+            if sheets is not None and sheet_name not in sheets:
+                continue
+            headers, records = read_sheet(wb[sheet_name], max_rows, columns)
+            yield sheet_name, headers, records
+    finally:
+        wb.close()
+
+
+def read_excel_sheet(
+    source: Union[bytes, str, BinaryIO],
+    sheet_name: str,
+    max_rows: Optional[int] = None,
+    columns: Optional[List[str]] = None,
+) -> Optional[Tuple[List[str], Iterator[Dict[str, Any]]]]:
+    """
+    Streams a single sheet. Returns (headers, records) or None if the sheet
+    does not exist. The workbook is closed once records is exhausted.
+    """
+    wb = _load_workbook(source)
+    if sheet_name not in wb.sheetnames:
+        wb.close()
+        return None
+    headers, records = read_sheet(wb[sheet_name], max_rows, columns)
+
+    def stream():
+        try:
+            yield from records
+        finally:
+            wb.close()
 
-                row_data[headers[i]] = {"v": val, "c": color}
-            records.append(row_data)
+    return headers, stream()
 
-        if records:
-            result[sheet_name] = records
 
+def read_workbook_metadata(source: Union[bytes, str, BinaryIO]) -> List[Dict[str, Any]]:
+    """
+    Cheap workbook summary: sheet names, dimensions and header row.
+    Cell fills and data rows are not read, so row_count comes from the
+    sheet's stored dimensions (header row excluded) and may include
+    empty rows; it is None when the file doesn't record dimensions.
+    """
+    wb = _load_workbook(source)
+    try:
+        result = []
+        for sheet_name in wb.sheetnames:
+            ws = wb[sheet_name]
+            first = next(ws.iter_rows(max_row=1, values_only=True), None)
+            if first is None:
+                continue
+            headers = [
+                str(v).strip() if v is not None else f"Unnamed:{i}"
+                for i, v in enumerate(first, start=1)
+            ]
+            try:
+                dimensions = ws.calculate_dimension()
+            except ValueError:
+                # Read-only sheet without a stored dimension
+                dimensions = None
+            max_row = ws.max_row if dimensions else None
+            result.append(
+                {
+                    "sheet_name": sheet_name,
+                    "headers": headers,
+                    "dimensions": dimensions,
+                    "row_count": max_row - 1 if max_row else None,
+                }
+            )
+        return result
+    finally:
+        wb.close()
+
+
+def parse_excel_file(
+    file_content: Union[bytes, BinaryIO],
+    sheets: Optional[List[str]] = None,
+    max_rows: Optional[int] = None,
+    columns: Optional[List[str]] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Parses an Excel file using openpyxl to extract values AND background colors.
+    Returns a dict where keys are sheet names and values are list of records.
+    Each record is: { "Header": { "v": value, "c": "FFFFFF" } }
+    sheets, max_rows and columns narrow what is parsed (see iter_excel_sheets).
+    Use iter_excel_sheets to process rows without holding them all in memory.
+    """
+    result = {}
+    for sheet_name, _, records in iter_excel_sheets(
+        file_content, sheets, max_rows, columns
+    ):
+        rows = list(records)
+        if rows:
+            result[sheet_name] = rows
     return result
 
 
-def propose_mapping(headers: List[str]) -> Dict[str, Dict[str, Any]]:
+# Leading bytes of xlsx (zip) and legacy xls (OLE) files
+SPREADSHEET_MAGIC = (b"PK\x03\x04", b"\xd0\xcf\x11\xe0")
+# Web pages, e.g. the sign-in page a private sheet link redirects to
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+HTML_MAGIC = (b"<!doctype", b"<html")
+CSV_SNIFF_BYTES = 64 * 1024
+
+
+def _is_html(head: bytes, content_type: Optional[str]) -> bool:
+    if content_type and content_type.startswith(HTML_CONTENT_TYPES):
+        return True
+    return head.lstrip(b"\xef\xbb\xbf \t\r\n").lower().startswith(HTML_MAGIC)
+
+
+def sniff_format(head: bytes, content_type: Optional[str] = None) -> str:
+    """
+    Tells a spreadsheet from a CSV payload by its first bytes, using the
+    declared content type only when the bytes don't decide it.
+    Returns "excel" or "csv". Raises ValueError for web pages.
+    """
+    if head.startswith(SPREADSHEET_MAGIC):
+        return "excel"
+    if _is_html(head, content_type):
+        raise ValueError("Got a web page, not a spreadsheet or CSV file")
+    if content_type and ("csv" in content_type or content_type.startswith("text/")):
+        return "csv"
+    # Anything else that isn't binary is treated as delimited text
+    return "excel" if b"\x00" in head else "csv"
+
+
+def read_csv_sheet(
+    source: BinaryIO,
+    max_rows: Optional[int] = None,
+    columns: Optional[List[str]] = None,
+) -> Tuple[List[str], Iterator[Dict[str, Any]]]:
+    """
+    Streams a CSV file in the same shape as read_sheet. Cells have no
+    colour; empty cells are None and everything else is kept as text.
+    The delimiter and encoding (UTF-8, else cp1252) are sniffed from the
+    start of the file.
+    """
+    head = source.read(CSV_SNIFF_BYTES)
+    source.seek(0)
+    try:
+        # The sample may end mid-character
+        sample = head.decode("utf-8-sig")
+        encoding = "utf-8-sig"
+    except UnicodeDecodeError as e:
+        if e.start >= len(head) - 3:
+            sample = head[: e.start].decode("utf-8-sig")
+            encoding = "utf-8-sig"
+        else:
+            sample = head.decode("cp1252", errors="replace")
+            encoding = "cp1252"
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+    except csv.Error:
+        dialect = csv.excel
+
+    text = TextIOWrapper(source, encoding=encoding, errors="replace", newline="")
+    reader = csv.reader(text, dialect)
+    first = next(reader, None)
+    if first is None:
+        text.detach()
+        return [], iter(())
+
+    headers = [
+        value.strip() if value.strip() else f"Unnamed:{i}"
+        for i, value in enumerate(first, start=1)
+    ]
+    selected = [
+        (i, header)
+        for i, header in enumerate(headers)
+        if columns is None or header in columns
+    ]
+
+    def records():
+        count = 0
+        try:
+            for row in reader:
+                if max_rows is not None and count >= max_rows:
+                    break
+
+                # Skip empty rows
+                if not any(value.strip() for value in row):
+                    continue
+
+                row_data = {}
+                for i, header in selected:
+                    value = row[i] if i < len(row) else ""
+                    row_data[header] = {"v": value if value != "" else None, "c": None}
+                count += 1
+                yield row_data
+        finally:
+            # Leave the caller's file open
+            text.detach()
+
+    return headers, records()
+
+
+def iter_import_sheets(
+    source: BinaryIO,
+    content_type: Optional[str] = None,
+    csv_sheet_name: str = "Sheet1",
+) -> Iterator[Tuple[str, List[str], Iterator[Dict[str, Any]]]]:
+    """
+    Like iter_excel_sheets, but also accepts CSV files, which come back as
+    a single sheet named csv_sheet_name.
+    """
+    head = source.read(512)
+    source.seek(0)
+    if sniff_format(head, content_type) == "csv":
+        headers, records = read_csv_sheet(source)
+        yield csv_sheet_name, headers, records
+    else:
+        yield from iter_excel_sheets(source)
+
+
+# Remote sheets (e.g. Google Sheets export links)
+IMPORT_URL_MAX_BYTES = int(os.getenv("IMPORT_URL_MAX_BYTES", str(20 * 1024 * 1024)))
+IMPORT_URL_TIMEOUT = float(os.getenv("IMPORT_URL_TIMEOUT", "30"))
+
+_http_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """Shared session for fetching import URLs, created on first use."""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=IMPORT_URL_TIMEOUT)
+        )
+    return _http_session
+
+
+async def close_http_session():
+    global _http_session
+    if _http_session is not None:
+        await _http_session.close()
+        _http_session = None
+
+
+async def download_to_file(
+    url: str, dest: BinaryIO, max_bytes: int = IMPORT_URL_MAX_BYTES
+) -> Optional[str]:
+    """
+    Streams url into dest, refusing bodies larger than max_bytes.
+    Returns the response content type. Raises ValueError when the URL
+    can't be fetched or is too large.
+    """
+    session = get_http_session()
+    try:
+        async with session.get(url) as resp:
+            if resp.status != 200:
+                raise ValueError("Could not fetch URL")
+            if resp.content_length and resp.content_length > max_bytes:
+                raise ValueError("File too large")
+            size = 0
+            async for chunk in resp.content.iter_chunked(64 * 1024):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValueError("File too large")
+                dest.write(chunk)
+            dest.seek(0)
+            return resp.content_type
+    except (aiohttp.ClientError, TimeoutError) as e:
+        raise ValueError(f"Could not fetch URL: {e}")
+
+
+# Candidates normalized once, the way process.extractOne prepares choices
+_NORMALIZED_TARGETS = {
+    db_col: [utils.full_process(c, force_ascii=True) for c in candidates]
+    for db_col, candidates in COLUMN_MAPPING_TARGETS.items()
+}
+HEADER_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def header_scores(header: str) -> Tuple[Tuple[str, int], ...]:
+    """
+    Best candidate score of a header for every DB column, as
+    process.extractOne(header, candidates) would score it.
+    """
+    norm = utils.full_process(utils.full_process(header), force_ascii=True)
+    return tuple(
+        (
+            db_col,
+            max(fuzz.WRatio(norm, c, full_process=False) for c in candidates),
+        )
+        for db_col, candidates in _NORMALIZED_TARGETS.items()
+    )
+
+
+def propose_mapping(
+    headers: List[str], learned: Optional[Dict[str, str]] = None
+) -> Dict[str, Dict[str, Any]]:
     """
     For each DB column, find the best matching header from the file.
+    learned maps DB columns to the header the user picked last time;
+    when that header is present it is proposed with a score of 100.
     Returns:
     {
         "db_col_name": {
@@ -92,27 +427,26 @@ def propose_mapping(headers: List[str]) -> Dict[str, Dict[str, Any]]:
     }
     """
     mapping = {}
+    scores = [(header, dict(header_scores(str(header)))) for header in headers]
 
-    for db_col, candidates in COLUMN_MAPPING_TARGETS.items():
-        best_match = None
-        best_score = 0
-        alternatives = []  # type: List[str]
-
-        header_scores = []
-        for header in headers:
-            # Check if header matches any of the candidates
-            extract = process.extractOne(str(header), candidates)
-            if extract:
-                score = extract[1]
-                header_scores.append((header, score))
-
+    for db_col in COLUMN_MAPPING_TARGETS:
         # Sort headers by score descending
-        header_scores.sort(key=lambda x: x[1], reverse=True)
+        header_scores_list = sorted(
+            ((header, by_col[db_col]) for header, by_col in scores),
+            key=lambda x: x[1],
+            reverse=True,
+        )
 
-        if header_scores:
-            best_match = header_scores[0][0]
-            best_score = header_scores[0][1]
-            alternatives = [h[0] for h in header_scores[1:3]]
+        learned_header = (learned or {}).get(db_col)
+        if learned_header in headers:
+            header_scores_list = [(learned_header, 100)] + [
+                h for h in header_scores_list if h[0] != learned_header
+            ]
+
+        if header_scores_list:
+            best_match = header_scores_list[0][0]
+            best_score = header_scores_list[0][1]
+            alternatives = [h[0] for h in header_scores_list[1:3]]
 
             mapping[db_col] = {
                 "selected": best_match if best_score > 60 else None,
@@ -123,17 +457,108 @@ def propose_mapping(headers: List[str]) -> Dict[str, Dict[str, Any]]:
     return mapping
 
 
-def fuzzy_find_game(title: str, existing_games: List[Game]) -> Game:
+class TitleIndex:
+    """
+    Title lookup over a user's library, built once per import.
+    Titles are normalized the same way thefuzz does; exact matches are
+    answered from a dict, otherwise games sharing the most character
+    trigrams with the query are shortlisted and only those are scored.
+    Games can be added (or swapped) while the import runs.
+    """
+
+    CANDIDATE_LIMIT = 32
+
+    def __init__(self, games: List[Game] = ()):
+        self._games: List[Optional[Game]] = []
+        self._norms: List[str] = []
+        self._gram_counts: List[int] = []
+        self._exact: Dict[str, int] = {}
+        self._grams: Dict[str, set] = {}
+        # id(game) -> its slots, so replace() doesn't scan the library. The
+        # games are referenced from _games, so their ids stay unique.
+        self._slots: Dict[int, List[int]] = {}
+        for game in games:
+            self.add(game)
+
+    @staticmethod
+    def _trigrams(norm: str) -> set:
+        padded = f" {norm} "
+        return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+    def add(self, game: Game):
+        if not game.title:
+            return
+        slot = len(self._games)
+        norm = utils.full_process(game.title)
+        self._games.append(game)
+        self._slots.setdefault(id(game), []).append(slot)
+        self._norms.append(norm)
+        # Last game wins for duplicate titles, like a {title: game} dict
+        self._exact[norm] = slot
+        grams = self._trigrams(norm)
+        self._gram_counts.append(len(grams))
+        for gram in grams:
+            self._grams.setdefault(gram, set()).add(slot)
+
+    def __len__(self):
+        return len(self._games)
+
+    def replace(self, old: Game, new: Game):
+        slots = self._slots.pop(id(old), [])
+        for slot in slots:
+            self._games[slot] = new
+        if slots:
+            self._slots.setdefault(id(new), []).extend(slots)
+
+    def find(self, title: str, threshold: int = 90) -> Optional[Game]:
+        norm = utils.full_process(title)
+        if not norm:
+            return None
+
+        slot = self._exact.get(norm)
+        if slot is not None:
+            return self._games[slot]
+
+        grams = self._trigrams(norm)
+        hits = Counter()
+        for gram in grams:
+            for slot in self._grams.get(gram, ()):
+                hits[slot] += 1
+        if not hits:
+            return None
+
+        # Rank by overlap coefficient so titles contained in the query (or
+        # vice versa), which WRatio scores highly, make the shortlist
+        def overlap(slot):
+            size = min(len(grams), self._gram_counts[slot])
+            return hits[slot] / size, hits[slot]
+
+        ranked = sorted(hits, key=overlap, reverse=True)
+        # Ties go to the earliest game, as with process.extractOne
+        shortlist = sorted(ranked[: self.CANDIDATE_LIMIT])
+
+        best_slot = None
+        best_score = -1
+        for slot in shortlist:
+            score = fuzz.WRatio(norm, self._norms[slot], full_process=False)
+            if score > best_score:
+                best_slot, best_score = slot, score
+
+        if best_score >= threshold:
+            return self._games[best_slot]
+        return None
+
+
+def fuzzy_find_game(title: str, existing_games: Union[TitleIndex, List[Game]]) -> Game:
     """
     Finds an existing game in the user's library that matches the title.
+    Pass a TitleIndex when matching many titles against the same library.
     """
     if not title or not existing_games:
         return None
 
-    choices = {g.title: g for g in existing_games}
-    extract = process.extractOne(title, choices.keys())
-
-    if extract and extract[1] >= 90:  # High threshold for automatic matching
-        return choices[extract[0]]
+    if not isinstance(existing_games, TitleIndex):
+        existing_games = TitleIndex(existing_games)
 
-    return None
+    # High threshold for automatic matching
+    return existing_games.find(title, threshold=90)
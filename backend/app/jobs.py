@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import crud, database, models
+
+logger = logging.getLogger(__name__)
+
+# Jobs running at once in this process; the rest wait in the queue
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Minimum seconds between progress writes to the DB
+JOB_PROGRESS_INTERVAL = float(os.getenv("JOB_PROGRESS_INTERVAL", "1.0"))
+# Seconds between heartbeats on this process's unfinished jobs
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "30"))
+# Unfinished jobs without a heartbeat for this long belong to a dead process
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "120"))
+
+# Identifies this process as the owner of the jobs it runs
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+TERMINAL_STATUSES = (
+    models.JobStatus.COMPLETED,
+    models.JobStatus.FAILED,
+    models.JobStatus.CANCELLED,
+)
+
+
+class JobContext:
+    """Handed to a running job to report progress."""
+
+    def __init__(self, job_id: str, queue: "JobQueue"):
+        self.job_id = job_id
+        self.queue = queue
+        self.processed = 0
+        self.total: Optional[int] = None
+        self._last_write = 0.0
+
+    async def report(self, processed: int, total: Optional[int] = None):
+        self.processed = processed
+        if total is not None:
+            self.total = total
+        now = time.monotonic()
+        if now - self._last_write >= JOB_PROGRESS_INTERVAL:
+            self._last_write = now
+            fields = {"processed": processed}
+            if total is not None:
+                fields["total"] = total
+            await self.queue.set_state(self.job_id, **fields)
+            # Cancels requested through another process land in the DB
+            if await self.queue.cancel_requested(self.job_id):
+                raise asyncio.CancelledError()
+        else:
+            # Let other requests (and cancellation) in between rows
+            await asyncio.sleep(0)
+
+
+JobFunc = Callable[[JobContext], Awaitable[Any]]
+# Runs once the job is over, however it ended (even if it never started)
+JobCleanup = Callable[[], None]
+
+
+class JobQueue:
+    """
+    Interface for running import jobs. Job state lives in the import_jobs
+    table so any process can read it; a queue backed by an external broker
+    can be plugged in with set_queue().
+    """
+
+    instance_id: str = INSTANCE_ID
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def submit(
+        self, job_id: str, func: JobFunc, on_finish: Optional[JobCleanup] = None
+    ) -> None:
+        raise NotImplementedError
+
+    async def cancel(self, job_id: str) -> bool:
+        """Cancels the job if it runs here; False if it doesn't."""
+        raise NotImplementedError
+
+    async def cancel_requested(self, job_id: str) -> bool:
+        async with database.AsyncSessionLocal() as db:
+            return await crud.is_import_job_cancel_requested(db, job_id)
+
+    async def wait_for_update(self, job_id: str, timeout: float) -> None:
+        # Without change notifications, watchers just poll
+        await asyncio.sleep(timeout)
+
+    async def set_state(self, job_id: str, **fields) -> None:
+        async with database.AsyncSessionLocal() as db:
+            await crud.update_import_job(db, job_id, **fields)
+
+
+class InProcessJobQueue(JobQueue):
+    """Runs jobs as asyncio tasks in this process, JOB_WORKERS at a time."""
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._events: Dict[str, asyncio.Event] = {}
+        self._stopping = False
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._stopping = False
+        await self.fail_stale_jobs()
+        self._heartbeat = asyncio.create_task(self._beat())
+
+    async def fail_stale_jobs(self) -> int:
+        """
+        Jobs of a process that died (or restarted) can't finish; they stop
+        getting heartbeats and are failed here. Other live workers' jobs
+        keep theirs and are left alone.
+        """
+        stale_before = models.utcnow() - timedelta(seconds=JOB_STALE_AFTER)
+        async with database.AsyncSessionLocal() as db:
+            interrupted = await crud.fail_interrupted_jobs(db, stale_before)
+        if interrupted:
+            logger.warning(f"Marked {interrupted} interrupted import jobs as failed")
+        return interrupted
+
+    async def _beat(self) -> None:
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+            try:
+                async with database.AsyncSessionLocal() as db:
+                    await crud.touch_import_jobs(db, self.instance_id)
+                await self.fail_stale_jobs()
+            except Exception:
+                logger.exception("Import job heartbeat failed")
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def submit(
+        self, job_id: str, func: JobFunc, on_finish: Optional[JobCleanup] = None
+    ) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        task = asyncio.create_task(self._run(job_id, func))
+        self._tasks[job_id] = task
+        if on_finish is not None:
+            # A done callback also runs for tasks cancelled while queued
+            task.add_done_callback(lambda _: _run_cleanup(job_id, on_finish))
+
+    async def cancel(self, job_id: str) -> bool:
+        task = self._tasks.get(job_id)
+        if task is None:
+            return False
+        task.cancel()
+        # Give the job a moment to record that it stopped
+        await asyncio.wait([task], timeout=5)
+        return True
+
+    async def wait_for_update(self, job_id: str, timeout: float) -> None:
+        event = self._events.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def set_state(self, job_id: str, **fields) -> None:
+        await super().set_state(job_id, **fields)
+        event = self._events.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def _run(self, job_id: str, func: JobFunc) -> None:
+        ctx = JobContext(job_id, self)
+        try:
+            async with self._slots:
+                if await self.cancel_requested(job_id):
+                    raise asyncio.CancelledError()
+                await self.set_state(job_id, status=models.JobStatus.RUNNING)
+                result = await func(ctx)
+            await self.set_state(
+                job_id,
+                status=models.JobStatus.COMPLETED,
+                processed=ctx.total if ctx.total is not None else ctx.processed,
+                result=result,
+            )
+        except asyncio.CancelledError:
+            if self._stopping:
+                await self.set_state(
+                    job_id,
+                    status=models.JobStatus.FAILED,
+                    processed=ctx.processed,
+                    error="Interrupted by a restart",
+                )
+            else:
+                await self.set_state(
+                    job_id, status=models.JobStatus.CANCELLED, processed=ctx.processed
+                )
+        except Exception as e:
+            logger.exception(f"Import job {job_id} failed")
+            await self.set_state(
+                job_id,
+                status=models.JobStatus.FAILED,
+                processed=ctx.processed,
+                error=str(e),
+            )
+        finally:
+            self._tasks.pop(job_id, None)
+
+
+def _run_cleanup(job_id: str, on_finish: JobCleanup) -> None:
+    try:
+        on_finish()
+    except Exception:
+        logger.exception(f"Cleanup of import job {job_id} failed")
+
+
+queue: JobQueue = InProcessJobQueue()
+
+
+def set_queue(new_queue: JobQueue) -> None:
+    global queue
+    queue = new_queue
+
+
+async def submit(
+    db: AsyncSession,
+    user_id: int,
+    kind: str,
+    func: JobFunc,
+    total: Optional[int] = None,
+    on_finish: Optional[JobCleanup] = None,
+) -> str:
+    """
+    Records a queued job for the user and hands it to the queue.
+    on_finish releases resources the job owns (e.g. temp files) and is
+    called whether the job runs, fails or is cancelled before starting.
+    """
+    job_id = uuid.uuid4().hex
+    try:
+        await crud.create_import_job(
+            db, job_id, user_id, kind, total, owner=queue.instance_id
+        )
+        await queue.submit(job_id, func, on_finish)
+    except Exception:
+        if on_finish is not None:
+            _run_cleanup(job_id, on_finish)
+        raise
+    return job_id
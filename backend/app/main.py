@@ -1,23 +1,41 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from .database import init_db
+from . import observability
 import logging
+import time
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
-logging.basicConfig(level=logging.INFO)
+from . import auth, ai_import, ai_cache, jobs, import_utils
+
+observability.setup_logging()
 logger = logging.getLogger(__name__)
+access_logger = logging.getLogger("app.access")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    observability.setup_logging()
     await init_db()
+    try:
+        ai_import.init_client()
+    except Exception as e:
+        # AI import stays unavailable, the rest of the API works
+        logger.warning(f"AI client not initialized: {e}")
+    await jobs.queue.start()
     yield
     # Shutdown
+    await jobs.queue.stop()
+    await ai_import.close_client()
+    await ai_cache.close_cache()
+    await import_utils.close_http_session()
+    auth.shutdown_hash_pool()
+    observability.stop_logging()
 
 
 app = FastAPI(title="Video Game Tracker API", lifespan=lifespan)
@@ -34,18 +52,52 @@ app.add_middleware(
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    logger.info(f">>> {request.method} {request.url.path}")
-    response = await call_next(request)
-    logger.info(f"<<< {request.method} {request.url.path} -> {response.status_code}")
-    return response
+    stats = observability.start_request()
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        if observability.DEBUG_DB_HEADERS:
+            response.headers["X-DB-Query-Count"] = str(stats.db_queries)
+            response.headers["X-DB-Time-Ms"] = f"{stats.db_seconds * 1000:.2f}"
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        # Label by route template to keep the number of series bounded
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        observability.metrics.observe(
+            request.method, route_path, status_code, elapsed, stats
+        )
+        access_logger.info(
+            "request",
+            extra={
+                "method": request.method,
+                "path": request.url.path,
+                "route": route_path,
+                "status": status_code,
+                "duration_ms": round(elapsed * 1000, 2),
+                "db_queries": stats.db_queries,
+                "db_ms": round(stats.db_seconds * 1000, 2),
+            },
+        )
 
 
-from .routers import users, games, import_data, ai_import_router
+from .routers import users, games, import_data, ai_import_router, jobs as jobs_router
 
 app.include_router(users.router)
 app.include_router(games.router)
 app.include_router(import_data.router)
 app.include_router(ai_import_router.router)
+app.include_router(jobs_router.router)
+
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    return Response(
+        observability.metrics.render(), media_type="text/plain; version=0.0.4"
+    )
 
 
 @app.get("/")
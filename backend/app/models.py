@@ -1,9 +1,27 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, Enum
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Float,
+    Boolean,
+    ForeignKey,
+    Enum,
+    Index,
+    UniqueConstraint,
+    DateTime,
+    JSON,
+)
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from .database import Base
+from datetime import datetime, timezone
 import enum
 
 
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class GameStatus(str, enum.Enum):
     BACKLOG = "backlog"
     FINISHED = "finished"
@@ -16,6 +34,14 @@ class GameProgress(str, enum.Enum):
     FINISHED = "TERMINADO"
 
 
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -23,6 +49,8 @@ class User(Base):
     username = Column(String, unique=True, index=True)
     password_hash = Column(String)
     is_admin = Column(Boolean, default=False)
+    # Bumped by every write to the user's games; used for ETags
+    library_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     games = relationship("Game", back_populates="owner")
 
@@ -52,3 +80,120 @@ class Game(Base):
 
     user_id = Column(Integer, ForeignKey("users.id"))
     owner = relationship("User", back_populates="games")
+
+    # Set in Python (microsecond precision) so /games/changes can order
+    # writes made within the same second
+    created_at = Column(
+        DateTime(timezone=True), default=utcnow, server_default=func.now()
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=utcnow,
+        onupdate=utcnow,
+        server_default=func.now(),
+    )
+
+    # Every query is scoped to one user's library; keep these in sync with
+    # the alembic migrations in backend/alembic/versions
+    __table_args__ = (
+        Index("ix_games_user_id_status", "user_id", "status"),
+        Index("ix_games_user_id_title", "user_id", "title"),
+        Index("ix_games_user_id_updated_at", "user_id", "updated_at"),
+    )
+
+
+# Full-text search over title and notes (crud.search_games). None of this
+# can be declared as a Table; migration 0008 creates it as raw DDL and
+# writes keep it in sync through triggers (SQLite) or plain index
+# maintenance (Postgres).
+SEARCH_VECTOR = (
+    "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(notes, ''))"
+)
+SEARCH_OBJECTS = {
+    "games_fts",
+    "games_fts_data",
+    "games_fts_idx",
+    "games_fts_docsize",
+    "games_fts_config",
+    "ix_games_search",
+    "ix_games_title_trgm",
+}
+
+
+class GameTombstone(Base):
+    """A deleted game, kept so clients can drop it on their next sync."""
+
+    __tablename__ = "game_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    game_id = Column(Integer)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    deleted_at = Column(DateTime(timezone=True), default=utcnow)
+
+    __table_args__ = (
+        Index("ix_game_tombstones_user_id_deleted_at", "user_id", "deleted_at"),
+    )
+
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id = Column(String, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    kind = Column(String)
+    status = Column(Enum(JobStatus), default=JobStatus.QUEUED)
+    processed = Column(Integer, default=0)
+    total = Column(Integer, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    # jobs.INSTANCE_ID of the process running the job; that process keeps
+    # updated_at fresh while the job is queued or running
+    owner = Column(String, nullable=True)
+    # Set when a process other than the owner is asked to cancel the job
+    cancel_requested = Column(Boolean, default=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=utcnow
+    )
+
+
+class HeaderMapping(Base):
+    """The sheet header a user last mapped to each DB column on import."""
+
+    __tablename__ = "header_mappings"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    db_column = Column(String)
+    header = Column(String)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "db_column", name="uq_header_mappings_user_column"),
+    )
+
+
+class LibraryStat(Base):
+    """
+    Running totals of a user's games for one bucket of a dimension
+    (status, platform, finish_year, progress, or "all" for the library),
+    kept up to date by the crud write functions.
+    """
+
+    __tablename__ = "library_stats"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    dimension = Column(String, nullable=False)
+    # Enum name, platform or year as text; "" when the game has no value
+    bucket = Column(String, nullable=False)
+    games = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Float, nullable=False, default=0)
+    rating_count = Column(Integer, nullable=False, default=0)
+    playtime_sum = Column(Float, nullable=False, default=0)
+    price_sum = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "dimension", "bucket", name="uq_library_stats_bucket"
+        ),
+    )
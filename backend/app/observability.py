@@ -0,0 +1,264 @@
+import bisect
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from collections import Counter, deque
+from typing import Dict, Optional, Tuple
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# Requests kept per route to compute latency quantiles
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "1024"))
+
+# Statements slower than this are logged
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Include bound parameters in slow query logs; they can hold password hashes
+LOG_QUERY_PARAMS = os.getenv("LOG_QUERY_PARAMS", "false").lower() in ("1", "true")
+# Adds X-DB-Query-Count / X-DB-Time-Ms headers to every response
+DEBUG_DB_HEADERS = os.getenv("DEBUG_DB_HEADERS", "false").lower() in ("1", "true")
+
+# Histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Fields of a LogRecord that aren't structured extras
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message",
+    "asctime",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+# Root handlers and level from before setup_logging, put back by stop_logging
+_saved_root: Optional[Tuple[list, int]] = None
+
+
+def setup_logging() -> None:
+    """
+    Routes all app logging through a queue so handlers write from a
+    background thread instead of the event loop. Safe to call again after
+    stop_logging (e.g. once per app lifespan).
+    """
+    global _listener, _saved_root
+    if _listener is not None:
+        return
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream = logging.StreamHandler()
+    stream.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream, respect_handler_level=True
+    )
+    _listener.start()
+
+    root = logging.getLogger()
+    _saved_root = (root.handlers[:], root.level)
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(LOG_LEVEL)
+
+
+def stop_logging() -> None:
+    """Drains the queue and restores the root handlers setup_logging replaced."""
+    global _listener, _saved_root
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    if _saved_root is not None:
+        root.handlers, level = _saved_root
+        root.setLevel(level)
+        _saved_root = None
+    _listener.stop()
+    _listener = None
+
+
+class RequestStats:
+    """Database work done while serving one request."""
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+
+# Set per request; DB events running in tasks spawned by the request share
+# the same RequestStats object
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "request_stats", default=None
+)
+
+
+def start_request() -> RequestStats:
+    stats = RequestStats()
+    _request_stats.set(stats)
+    return stats
+
+
+db_logger = logging.getLogger("app.db")
+
+
+def instrument_engine(sync_engine) -> None:
+    """Counts and times every statement run on the engine."""
+    from sqlalchemy import event
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.db_queries += 1
+            stats.db_seconds += elapsed
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            extra = {"duration_ms": round(elapsed * 1000, 2), "statement": statement}
+            if LOG_QUERY_PARAMS:
+                # Bulk inserts can carry thousands of rows
+                extra["parameters"] = repr(parameters)[:1000]
+            db_logger.warning("Slow query", extra=extra)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        # A failed statement never reaches after_cursor_execute
+        conn = context.connection
+        if conn is not None and context.statement is not None:
+            starts = conn.info.get("query_start")
+            if starts:
+                starts.pop()
+
+
+class RouteStats:
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.db_total = 0.0
+        self.db_queries = 0
+        self.recent: deque = deque(maxlen=METRICS_WINDOW)
+
+    def observe(self, seconds: float, request: RequestStats):
+        index = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        if index < len(self.buckets):
+            self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.db_total += request.db_seconds
+        self.db_queries += request.db_queries
+        self.recent.append(seconds)
+
+    def quantiles(self) -> Dict[float, float]:
+        ordered = sorted(self.recent)
+        if not ordered:
+            return {}
+        return {
+            q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES
+        }
+
+
+class Metrics:
+    """In-process request metrics, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], RouteStats] = {}
+        self.statuses: Counter = Counter()
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        seconds: float,
+        request: RequestStats,
+    ):
+        stats = self.routes.get((method, route))
+        if stats is None:
+            stats = self.routes[(method, route)] = RouteStats()
+        stats.observe(seconds, request)
+        self.statuses[(method, route, status)] += 1
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by route.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), stats in sorted(self.routes.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                cumulative += count
+                lines.append(
+                    f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.count}'
+            )
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {stats.total}")
+            lines.append(
+                f"http_request_duration_seconds_count{{{labels}}} {stats.count}"
+            )
+
+        lines += [
+            "# HELP http_request_duration_quantile_seconds Latency quantiles over recent requests.",
+            "# TYPE http_request_duration_quantile_seconds gauge",
+        ]
+        for (method, route), stats in sorted(self.routes.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            for q, value in stats.quantiles().items():
+                lines.append(
+                    f'http_request_duration_quantile_seconds{{{labels},quantile="{q}"}} {value}'
+                )
+
+        lines += [
+            "# HELP http_request_db_seconds_total Time spent in the database by route.",
+            "# TYPE http_request_db_seconds_total counter",
+        ]
+        for (method, route), stats in sorted(self.routes.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            lines.append(f"http_request_db_seconds_total{{{labels}}} {stats.db_total}")
+
+        lines += [
+            "# HELP http_request_db_queries_total SQL statements run by route.",
+            "# TYPE http_request_db_queries_total counter",
+        ]
+        for (method, route), stats in sorted(self.routes.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            lines.append(
+                f"http_request_db_queries_total{{{labels}}} {stats.db_queries}"
+            )
+
+        lines += [
+            "# HELP http_requests_total Requests by route and status code.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(self.statuses.items()):
+            lines.append(
+                f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}'
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+metrics = Metrics()
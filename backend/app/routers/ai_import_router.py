@@ -1,15 +1,33 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union, Iterator, Callable, Awaitable
 from pydantic import BaseModel
+import itertools
+import openai
 import logging
-
-from .. import database, schemas, crud, auth, models, import_utils, ai_import
+import os
+import shutil
+import tempfile
+
+from .. import (
+    database,
+    schemas,
+    crud,
+    auth,
+    models,
+    import_utils,
+    ai_import,
+    ai_cache,
+    jobs,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/import/ai", tags=["ai-import"])
 
+# Pending creates/updates are written to the DB in batches of this size
+WRITE_BATCH_SIZE = 100
+
 
 # --- Request / Response Models ---
 
@@ -34,6 +52,10 @@ class AIUploadResponse(BaseModel):
     conflicts: List[ConflictItem]
 
 
+class JobSubmitted(BaseModel):
+    job_id: str
+
+
 class ResolutionItem(BaseModel):
     game_id: int
     choice: str  # 'new' or 'existing'
@@ -50,35 +72,56 @@ class ResolveRequest(BaseModel):
 @router.post("/analyze")
 async def ai_analyze_file(
     file: UploadFile = File(...),
+    metadata_only: bool = Form(False),
     current_user: models.User = Depends(auth.get_current_user),
 ):
-    """Parse Excel and return sheet names + row counts for sheet selection."""
+    """
+    Parse Excel and return sheet names + row counts for sheet selection.
+    With metadata_only, only the header row and the stored sheet dimensions
+    are read, so row_count is approximate (or null).
+    """
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin required")
 
-    content = await file.read()
-
+    sheets_info = []
     try:
-        sheets_data = import_utils.parse_excel_file(content)
+        if metadata_only:
+            for meta in import_utils.read_workbook_metadata(file.file):
+                if meta["row_count"] == 0:
+                    continue
+                sheets_info.append(
+                    {
+                        "sheet_name": meta["sheet_name"],
+                        "row_count": meta["row_count"],
+                        "headers": [
+                            h for h in meta["headers"] if not h.startswith("Unnamed:")
+                        ],
+                        "dimensions": meta["dimensions"],
+                    }
+                )
+        else:
+            # Count rows without reading any cell values or fills
+            for sheet_name, headers, records in import_utils.iter_excel_sheets(
+                file.file, columns=[]
+            ):
+                row_count = sum(1 for _ in records)
+                if row_count:
+                    sheets_info.append(
+                        {
+                            "sheet_name": sheet_name,
+                            "row_count": row_count,
+                            "headers": [
+                                h for h in headers if not h.startswith("Unnamed:")
+                            ],
+                        }
+                    )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Could not parse file: {str(e)}")
 
-    sheets_info = []
-    for sheet_name, rows in sheets_data.items():
-        if rows:
-            headers = [h for h in list(rows[0].keys()) if not h.startswith("Unnamed:")]
-            sheets_info.append(
-                {
-                    "sheet_name": sheet_name,
-                    "row_count": len(rows),
-                    "headers": headers,
-                }
-            )
-
     return {"sheets": sheets_info}
 
 
-@router.post("/upload", response_model=AIUploadResponse)
+@router.post("/upload", response_model=Union[AIUploadResponse, JobSubmitted])
 async def ai_upload(
     file: UploadFile = File(...),
     sheet_name: str = Form(...),
@@ -86,12 +129,15 @@ async def ai_upload(
     title_column: str = Form(None),
     processing_strategy: str = Form("update"),  # 'skip' or 'update'
     extra_instructions: str = Form(None),
+    background: bool = Form(False),
     current_user: models.User = Depends(auth.get_current_user),
     db: AsyncSession = Depends(database.get_db),
 ):
     """
     Upload Excel, process each row with AI, and upsert into DB.
     Returns conflicts for user resolution.
+    With background=true the import runs as a job and its id is returned;
+    follow it through /jobs/{job_id}.
     """
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin required")
@@ -101,24 +147,112 @@ async def ai_upload(
             status_code=400, detail="status_choice must be 'backlog' or 'finished'"
         )
 
-    content = await file.read()
+    if background:
+        # The upload is gone once this request ends, keep a copy for the job
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".xlsx") as tmp:
+            shutil.copyfileobj(file.file, tmp)
+        sheet_source = tmp.name
+        try:
+            sheets = import_utils.read_workbook_metadata(sheet_source)
+        except Exception as e:
+            os.unlink(sheet_source)
+            raise HTTPException(
+                status_code=400, detail=f"Could not parse file: {str(e)}"
+            )
+        meta = next((m for m in sheets if m["sheet_name"] == sheet_name), None)
+        if meta is None:
+            os.unlink(sheet_source)
+            raise HTTPException(
+                status_code=400, detail=f"Sheet '{sheet_name}' not found or empty"
+            )
+        total = meta["row_count"]
+
+        user_id = current_user.id
+
+        async def job(ctx: jobs.JobContext):
+            job_headers, job_rows = _open_sheet(sheet_source, sheet_name)
+            async with database.AsyncSessionLocal() as job_db:
+                result = await run_ai_upload(
+                    job_db,
+                    user_id,
+                    job_headers,
+                    job_rows,
+                    status_choice,
+                    title_column,
+                    processing_strategy,
+                    extra_instructions,
+                    progress=lambda done: ctx.report(done, total),
+                )
+            return result.model_dump()
+
+        job_id = await jobs.submit(
+            db,
+            user_id,
+            "ai_upload",
+            job,
+            total=total,
+            # Also runs if the job is cancelled before it starts
+            on_finish=lambda: os.unlink(sheet_source),
+        )
+        return JobSubmitted(job_id=job_id)
 
+    headers, rows = _open_sheet(file.file, sheet_name)
     try:
-        sheets_data = import_utils.parse_excel_file(content)
+        return await run_ai_upload(
+            db,
+            current_user.id,
+            headers,
+            rows,
+            status_choice,
+            title_column,
+            processing_strategy,
+            extra_instructions,
+        )
+    except (openai.AuthenticationError, openai.PermissionDeniedError) as e:
+        raise HTTPException(
+            status_code=502, detail=f"AI service rejected the request: {e}"
+        )
+
+
+def _open_sheet(source, sheet_name: str):
+    """Returns (headers, rows) for a sheet, streaming its rows."""
+    try:
+        sheet = import_utils.read_excel_sheet(source, sheet_name)
+        first_row = next(sheet[1], None) if sheet else None
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Could not parse file: {str(e)}")
 
-    rows = sheets_data.get(sheet_name)
-    if not rows:
+    if first_row is None:
         raise HTTPException(
             status_code=400, detail=f"Sheet '{sheet_name}' not found or empty"
         )
+    rows = itertools.chain([first_row], sheet[1])
 
     # Get headers
-    headers = [h for h in list(rows[0].keys()) if not h.startswith("Unnamed:")]
-
+    headers = [h for h in first_row.keys() if not h.startswith("Unnamed:")]
+
+    return headers, rows
+
+
+async def run_ai_upload(
+    db: AsyncSession,
+    user_id: int,
+    headers: List[str],
+    rows: Iterator[Dict[str, Any]],
+    status_choice: str,
+    title_column: Optional[str],
+    processing_strategy: str,
+    extra_instructions: Optional[str],
+    progress: Optional[Callable[[int], Awaitable[None]]] = None,
+) -> AIUploadResponse:
+    """
+    Runs the AI import over streamed sheet rows and upserts into the DB.
+    progress, if given, is awaited with the index of each row as it is
+    applied.
+    """
     # Get existing games for conflict detection
-    existing_games = await crud.get_games(db, user_id=current_user.id)
+    existing_games = await crud.get_games(db, user_id=user_id)
+    title_index = import_utils.TitleIndex(existing_games)
 
     processed = 0
     created = 0
@@ -126,40 +260,85 @@ async def ai_upload(
     skipped = 0
     conflicts: List[ConflictItem] = []
 
-    for idx, row in enumerate(rows):
-        # Extract values and colors in header order
-        row_values = []
-        row_colors = []
-        for h in headers:
-            cell = row.get(h)
-            if isinstance(cell, dict):
-                row_values.append(cell.get("v"))
-                row_colors.append(cell.get("c"))
+    # Writes are collected and applied with crud.bulk_upsert_games.
+    # New games are represented in title_index by a transient placeholder
+    # until their batch is written.
+    pending: List = []  # (game_id or None, payload)
+    pending_rows: List[int] = []
+    pending_ids = set()
+    placeholders: Dict[int, tuple] = {}  # id(placeholder) -> (it, index in pending)
+
+    async def flush():
+        nonlocal created, updated, skipped
+        if not pending:
+            return
+        outcomes = await crud.bulk_upsert_games(db, user_id, pending)
+        for (game_id, _), row_idx, outcome in zip(pending, pending_rows, outcomes):
+            if outcome["action"] == "created":
+                created += 1
+            elif outcome["action"] == "updated":
+                updated += 1
             else:
-                row_values.append(cell)
-                row_colors.append(None)
-
+                logger.error(f"Row {row_idx}: Update error: game {game_id} not found")
+                skipped += 1
+        for placeholder, pos in placeholders.values():
+            title_index.replace(placeholder, outcomes[pos]["game"])
+        pending.clear()
+        pending_rows.clear()
+        pending_ids.clear()
+        placeholders.clear()
+
+    def already_exists(idx: int, row: Dict[str, Any]) -> bool:
         # SMART SKIP LOGIC
-        if processing_strategy == "skip" and title_column:
-            cell_data = row.get(title_column)
-            if cell_data:
-                # Extract value safely
-                raw_title = (
-                    cell_data.get("v") if isinstance(cell_data, dict) else cell_data
-                )
-                if raw_title:
-                    match = import_utils.fuzzy_find_game(str(raw_title), existing_games)
-                    if match:
-                        logger.info(
-                            f"Row {idx}: Skipped because '{raw_title}' already exists"
-                        )
-                        skipped += 1
-                        continue
+        if processing_strategy != "skip" or not title_column:
+            return False
+        cell_data = row.get(title_column)
+        if not cell_data:
+            return False
+        # Extract value safely
+        raw_title = cell_data.get("v") if isinstance(cell_data, dict) else cell_data
+        if raw_title and import_utils.fuzzy_find_game(str(raw_title), title_index):
+            logger.info(f"Row {idx}: Skipped because '{raw_title}' already exists")
+            return True
+        return False
+
+    # Rows handed to the AI pipeline but not yet applied
+    read_ahead: Dict[int, Dict[str, Any]] = {}
+
+    def ai_rows():
+        nonlocal skipped
+        for idx, row in enumerate(rows):
+            if already_exists(idx, row):
+                skipped += 1
+                continue
+            read_ahead[idx] = row
+
+            # Extract values and colors in header order
+            row_values = []
+            row_colors = []
+            for h in headers:
+                cell = row.get(h)
+                if isinstance(cell, dict):
+                    row_values.append(cell.get("v"))
+                    row_colors.append(cell.get("c"))
+                else:
+                    row_values.append(cell)
+                    row_colors.append(None)
+            yield idx, headers, row_values, row_colors
+
+    # AI calls run concurrently; results arrive in row order and are applied
+    # one by one, so the DB writes are the same as a sequential import
+    async for idx, ai_result in ai_import.process_rows_with_ai(
+        ai_rows(), status_choice, extra_instructions
+    ):
+        if progress is not None:
+            await progress(idx)
+
+        # Rows are read ahead, so an earlier row may have created this game
+        if already_exists(idx, read_ahead.pop(idx)):
+            skipped += 1
+            continue
 
-        # Call AI
-        ai_result = await ai_import.process_row_with_ai(
-            headers, row_values, status_choice, extra_instructions, row_colors
-        )
         processed += 1
 
         if ai_result is None:
@@ -168,7 +347,12 @@ async def ai_upload(
             continue
 
         # Check for existing game
-        match = import_utils.fuzzy_find_game(ai_result.title, existing_games)
+        match = import_utils.fuzzy_find_game(ai_result.title, title_index)
+        if match is not None and (id(match) in placeholders or match.id in pending_ids):
+            # The match has unwritten changes: write them so the comparison
+            # below sees the same state as a row-by-row import would
+            await flush()
+            match = import_utils.fuzzy_find_game(ai_result.title, title_index)
 
         if match:
             # Compare fields to detect real conflicts
@@ -229,10 +413,9 @@ async def ai_upload(
                 if update_payload:
                     try:
                         game_update = schemas.GameUpdate(**update_payload)
-                        await crud.update_game(
-                            db, match.id, game_update, current_user.id
-                        )
-                        updated += 1
+                        pending.append((match.id, game_update))
+                        pending_rows.append(idx)
+                        pending_ids.add(match.id)
                     except Exception as e:
                         logger.error(f"Row {idx}: Update error: {e}")
                         skipped += 1
@@ -243,14 +426,24 @@ async def ai_upload(
                 if "status" not in create_data:
                     create_data["status"] = status_choice
                 game_create = schemas.GameCreate(**create_data)
-                new_game = await crud.create_user_game(db, game_create, current_user.id)
-                created += 1
-                # Add to existing list so subsequent rows can match
-                existing_games.append(new_game)
+                placeholder = models.Game(**game_create.model_dump())
+                placeholders[id(placeholder)] = (placeholder, len(pending))
+                pending.append((None, game_create))
+                pending_rows.append(idx)
+                # Add to the index so subsequent rows can match
+                title_index.add(placeholder)
             except Exception as e:
                 logger.error(f"Row {idx}: Create error: {e}")
                 skipped += 1
 
+        if len(pending) >= WRITE_BATCH_SIZE:
+            await flush()
+
+    await flush()
+
+    if ai_cache.cache is not None:
+        logger.info(f"AI cache: {await ai_cache.cache.stats()}")
+
     return AIUploadResponse(
         processed=processed,
         created=created,
@@ -272,16 +465,23 @@ async def ai_resolve(
 
     resolved = 0
     kept = 0
+    updates = []
 
     for item in request.resolutions:
         if item.choice == "new" and item.new_data:
             try:
-                game_update = schemas.GameUpdate(**item.new_data)
-                await crud.update_game(db, item.game_id, game_update, current_user.id)
-                resolved += 1
+                updates.append((item.game_id, schemas.GameUpdate(**item.new_data)))
             except Exception as e:
                 logger.error(f"Resolve error for game {item.game_id}: {e}")
         else:
             kept += 1
 
+    if updates:
+        outcomes = await crud.bulk_upsert_games(db, current_user.id, updates)
+        for (game_id, _), outcome in zip(updates, outcomes):
+            if outcome["action"] == "updated":
+                resolved += 1
+            else:
+                logger.error(f"Resolve error for game {game_id}: not found")
+
     return {"resolved": resolved, "kept": kept}
@@ -1,18 +1,171 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Annotated
+import hashlib
+import os
 from .. import database, schemas, crud, auth, models
 
 router = APIRouter(prefix="/games", tags=["games"])
 
+# Sent with game reads; the default makes clients revalidate with the ETag
+GAMES_CACHE_CONTROL = os.getenv("GAMES_CACHE_CONTROL", "private, no-cache")
+# Most operations accepted by one POST /games/batch
+GAMES_BATCH_LIMIT = int(os.getenv("GAMES_BATCH_LIMIT", "500"))
 
-@router.get("/", response_model=List[schemas.Game])
+
+def _library_etag(user_id: int, version: int, request: Request) -> str:
+    # Each URL (path and query) of the same library version is a different
+    # representation
+    variant = hashlib.sha1(str(request.url.path + "?" + request.url.query).encode())
+    return f'"{user_id}-{version}-{variant.hexdigest()[:16]}"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def _conditional(
+    request: Request, response: Response, db: AsyncSession, user_id: int
+):
+    """
+    Sets ETag/Cache-Control for a read of the user's games. Returns a 304
+    response when the client's copy is current, else None.
+    """
+    version = await crud.get_library_version(db, user_id)
+    etag = _library_etag(user_id, version, request)
+    headers = {"ETag": etag, "Cache-Control": GAMES_CACHE_CONTROL}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+@router.get(
+    "/",
+    response_model=List[schemas.GamePartial],
+    response_model_exclude_unset=True,
+)
 async def read_games(
+    request: Request,
+    response: Response,
     status: str = None,
+    fields: str = None,  # comma separated, e.g. "title,hype_score,rating"
+    sort: str = "id",
+    order: str = "asc",  # 'asc' or 'desc'
+    limit: int = Query(None, ge=1, le=1000),
+    cursor: str = None,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(database.get_db),
+):
+    """
+    List the user's games. Without `limit` the whole list is returned.
+    When more rows are available, the cursor for the next page is sent
+    in the `X-Next-Cursor` header.
+    """
+    field_list = None
+    if fields:
+        field_list = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = [f for f in field_list if f not in crud.GAME_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown fields: {', '.join(unknown)}"
+            )
+    if sort not in crud.GAME_SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by '{sort}'")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+
+    not_modified = await _conditional(request, response, db, current_user.id)
+    if not_modified:
+        return not_modified
+
+    try:
+        rows, next_cursor = await crud.get_games_page(
+            db,
+            user_id=current_user.id,
+            status=status,
+            fields=field_list,
+            sort=sort,
+            descending=order == "desc",
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+
+@router.get("/changes", response_model=schemas.GameChanges)
+async def read_game_changes(
+    since: str = None,
+    limit: int = Query(500, ge=1, le=1000),
+    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(database.get_db),
+):
+    """
+    Delta sync. Without `since` every game is returned; afterwards pass the
+    returned cursor to get only games changed and ids deleted since then.
+    Apply `deleted` before `changed`; keep calling while `has_more` is set.
+    """
+    try:
+        changed, deleted, cursor, has_more = await crud.get_game_changes(
+            db, user_id=current_user.id, cursor=since, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "changed": changed,
+        "deleted": deleted,
+        "cursor": cursor,
+        "has_more": has_more,
+    }
+
+
+@router.get("/search", response_model=List[schemas.Game])
+async def search_games(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str = None,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(database.get_db),
+):
+    """
+    Search titles and notes; each word matches as a prefix ("zel bre"
+    finds "The Legend of Zelda: Breath of the Wild"). Best matches come
+    first; the cursor for the next page is sent in `X-Next-Cursor`.
+    """
+    not_modified = await _conditional(request, response, db, current_user.id)
+    if not_modified:
+        return not_modified
+
+    try:
+        games, next_cursor = await crud.search_games(
+            db, user_id=current_user.id, q=q, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return games
+
+
+@router.get("/stats", response_model=schemas.LibraryStats)
+async def read_library_stats(
     current_user: models.User = Depends(auth.get_current_user),
     db: AsyncSession = Depends(database.get_db),
 ):
-    return await crud.get_games(db, user_id=current_user.id, status=status)
+    """Library totals, read from the running counts kept on every write."""
+    return await crud.get_library_stats(db, user_id=current_user.id)
 
 
 @router.post("/", response_model=schemas.Game)
@@ -24,12 +177,59 @@ async def create_game(
     return await crud.create_user_game(db=db, game=game, user_id=current_user.id)
 
 
+@router.post("/batch", response_model=schemas.GameBatchResults)
+async def batch_games(
+    batch: schemas.GameBatch,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(database.get_db),
+):
+    """
+    Applies create/update/delete operations in one transaction, in order.
+    Updates and deletes of games that don't exist (or aren't the user's)
+    are reported as "not_found" without stopping the rest of the batch.
+    """
+    if not batch.operations:
+        raise HTTPException(status_code=400, detail="No operations")
+    if len(batch.operations) > GAMES_BATCH_LIMIT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {GAMES_BATCH_LIMIT} operations per batch",
+        )
+
+    outcomes = await crud.apply_game_batch(
+        db,
+        current_user.id,
+        [
+            (op.op, getattr(op, "id", None), getattr(op, "game", None))
+            for op in batch.operations
+        ],
+    )
+    results = []
+    for op, outcome in zip(batch.operations, outcomes):
+        game = outcome["game"]
+        results.append(
+            {
+                "op": op.op,
+                "status": outcome["action"],
+                "id": game.id if game is not None else getattr(op, "id", None),
+                "game": game if outcome["action"] in ("created", "updated") else None,
+            }
+        )
+    return {"results": results}
+
+
 @router.get("/{game_id}", response_model=schemas.Game)
 async def read_game(
     game_id: int,
+    request: Request,
+    response: Response,
     current_user: models.User = Depends(auth.get_current_user),
     db: AsyncSession = Depends(database.get_db),
 ):
+    not_modified = await _conditional(request, response, db, current_user.id)
+    if not_modified:
+        return not_modified
+
     db_game = await crud.get_game(db, game_id=game_id, user_id=current_user.id)
     if db_game is None:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -1,12 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    UploadFile,
+    File,
+    Form,
+    Query,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
 from pydantic import BaseModel
 import pandas as pd
-import aiohttp
-from io import BytesIO
-
-from .. import database, schemas, crud, auth, models, import_utils
+import logging
+import os
+import tempfile
+
+from .. import (
+    database,
+    schemas,
+    crud,
+    auth,
+    models,
+    import_utils,
+    import_sessions,
+    jobs,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/import", tags=["import"])
 
@@ -28,58 +48,80 @@ class ImportRequest(BaseModel):
     sheet_name: str
     column_mapping: Dict[str, Optional[str]]
     merge_strategy: str  # 'overwrite' or 'fill'
-    data: List[Dict[str, Any]]  # The raw rows for this sheet
+    # Either the id returned by /analyze or the raw rows for this sheet
+    session_id: Optional[str] = None
+    data: Optional[List[Dict[str, Any]]] = None
     value_mapping: Dict[str, Dict[str, Any]] = {}
     constants: Dict[str, Any] = {}
+    # Run as a job and return its id instead of the counts
+    background: bool = False
 
 
 class AnalyzeResponse(BaseModel):
+    session_id: str
     results: List[SheetAnalysis]
-    rows_map: Dict[str, List[Dict[str, Any]]]
+    rows_map: Optional[Dict[str, List[Dict[str, Any]]]] = None
+
+
+class SessionRowsResponse(BaseModel):
+    sheet_name: str
+    total: int
+    offset: int
+    rows: List[Dict[str, Any]]
 
 
 @router.post("/analyze", response_model=AnalyzeResponse)
 async def analyze_file(
     file: UploadFile = File(None),
     url: str = Form(None),
+    include_rows: bool = Form(True),
     current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(database.get_db),
 ):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin required")
 
-    content = None
-    if file:
-        content = await file.read()
-    elif url:
-        # Simple fetch for public sheets CSV/XLSX export links
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as resp:
-                if resp.status != 200:
-                    raise HTTPException(status_code=400, detail="Could not fetch URL")
-                content = await resp.read()
-    else:
-        raise HTTPException(status_code=400, detail="File or URL required")
-
-    try:
-        sheets_data = import_utils.parse_excel_file(content)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Could not parse file: {str(e)}")
-
-    analysis_results = []
-    rows_map = {}
+    with tempfile.TemporaryFile() as tmp:
+        if file:
+            source = file.file
+            content_type = file.content_type
+            sheet_name = os.path.splitext(file.filename or "")[0] or "Sheet1"
+        elif url:
+            # Public sheets CSV/XLSX export links are streamed to disk
+            try:
+                content_type = await import_utils.download_to_file(url, tmp)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            source = tmp
+            sheet_name = "Sheet1"
+        else:
+            raise HTTPException(status_code=400, detail="File or URL required")
+
+        sheets = {}
+        try:
+            # Parsed rows are kept server-side in columnar form
+            for name, headers, records in import_utils.iter_import_sheets(
+                source, content_type, csv_sheet_name=sheet_name
+            ):
+                sheet = import_sessions.SheetColumns.from_records(headers, records)
+                if sheet.row_count:
+                    sheets[name] = sheet
+        except Exception as e:
+            raise HTTPException(
+                status_code=400, detail=f"Could not parse file: {str(e)}"
+            )
 
-    for sheet_name, rows in sheets_data.items():
-        if not rows:
-            continue
+    session = import_sessions.create_session(current_user.id, sheets)
 
-        # Save rows to map
-        rows_map[sheet_name] = rows
+    # Headers the user confirmed on earlier imports win over fuzzy matches
+    learned = await crud.get_header_mappings(db, current_user.id)
 
-        # Get headers from first row keys
-        headers = [h for h in list(rows[0].keys()) if not h.startswith("Unnamed:")]
+    analysis_results = []
+    for sheet_name, sheet in sheets.items():
+        headers = [h for h in sheet.headers if not h.startswith("Unnamed:")]
 
         # Generate proposal
-        proposal = import_utils.propose_mapping(headers)
+        proposal = import_utils.propose_mapping(headers, learned)
 
         # Convert to pydantic friendly format
         clean_proposal = {}
@@ -90,12 +132,71 @@ async def analyze_file(
             SheetAnalysis(
                 sheet_name=sheet_name,
                 headers=headers,
-                row_count=len(rows),
+                row_count=sheet.row_count,
                 mapping_proposal=clean_proposal,
             )
         )
 
-    return {"results": analysis_results, "rows_map": rows_map}
+    rows_map = None
+    if include_rows:
+        # Legacy clients that send the rows back to /execute
+        rows_map = {name: list(sheet.iter_records()) for name, sheet in sheets.items()}
+
+    return {
+        "session_id": session.id,
+        "results": analysis_results,
+        "rows_map": rows_map,
+    }
+
+
+def _get_session_sheet(session_id: str, sheet_name: str, user_id: int):
+    session = import_sessions.get_session(session_id, user_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Import session not found")
+    sheet = session.sheets.get(sheet_name)
+    if sheet is None:
+        raise HTTPException(status_code=404, detail=f"Sheet '{sheet_name}' not found")
+    return sheet
+
+
+@router.get("/sessions/{session_id}/rows", response_model=SessionRowsResponse)
+async def read_session_rows(
+    session_id: str,
+    sheet_name: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    """Paginated preview of the rows held by an import session."""
+    sheet = _get_session_sheet(session_id, sheet_name, current_user.id)
+    return {
+        "sheet_name": sheet_name,
+        "total": sheet.row_count,
+        "offset": offset,
+        "rows": list(sheet.iter_records(offset, limit)),
+    }
+
+
+@router.get("/sessions/{session_id}/values")
+async def read_session_values(
+    session_id: str,
+    sheet_name: str,
+    header: str,
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    """Distinct values and colours of one column, for value mapping."""
+    sheet = _get_session_sheet(session_id, sheet_name, current_user.id)
+    return sheet.value_counts(header)
+
+
+@router.delete("/sessions/{session_id}")
+async def delete_session(
+    session_id: str,
+    current_user: models.User = Depends(auth.get_current_user),
+):
+    if not import_sessions.delete_session(session_id, current_user.id):
+        raise HTTPException(status_code=404, detail="Import session not found")
+    return {"ok": True}
 
 
 @router.post("/execute")
@@ -107,12 +208,6 @@ async def execute_import(
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Admin required")
 
-    # Get existing games for fuzzy matching
-    existing_games = await crud.get_games(db, user_id=current_user.id)
-
-    created_count = 0
-    updated_count = 0
-
     # Title mapping MUST exist (unless provided in constants? No, title is identity)
     # We still require title mapping for now to identify games
     title_header = request.column_mapping.get("title")
@@ -121,72 +216,152 @@ async def execute_import(
         if "title" not in request.constants:
             raise HTTPException(status_code=400, detail="Title mapping is required")
 
-    for row in request.data:
-        # Extract title
-        title_val = None
-        if title_header:
-            title_cell = row.get(title_header)
-            if title_cell:
-                if isinstance(title_cell, dict):
-                    title_val = title_cell.get("v")
-                else:
-                    title_val = title_cell
-
-        # If title is constant (edge case)
-        if "title" in request.constants:
-            title_val = request.constants["title"]
-
-        if not title_val:
-            print(
-                f"Skipping row: No title found. Row keys: {list(row.keys())}, Title Header: {title_header}"
-            )
+    if request.session_id:
+        sheet = _get_session_sheet(
+            request.session_id, request.sheet_name, current_user.id
+        )
+    elif request.data is not None:
+        sheet = import_sessions.SheetColumns.from_cells(request.data)
+    else:
+        raise HTTPException(status_code=400, detail="session_id or data required")
+
+    if request.background:
+        user_id = current_user.id
+
+        async def job(ctx: jobs.JobContext):
+            async with database.AsyncSessionLocal() as job_db:
+                return await run_execute_import(
+                    job_db,
+                    user_id,
+                    request,
+                    sheet,
+                    progress=lambda done: ctx.report(done, sheet.row_count),
+                )
+
+        job_id = await jobs.submit(db, user_id, "execute", job, total=sheet.row_count)
+        return {"job_id": job_id}
+
+    return await run_execute_import(db, current_user.id, request, sheet)
+
+
+def _map_columns(
+    request: ImportRequest, sheet: import_sessions.SheetColumns
+) -> Tuple[List[Any], Dict[str, List[Any]]]:
+    """
+    Resolves the import mapping over whole columns.
+    Returns the title of every row and, per DB column, its value for every
+    row: the constant if one is set, else the mapped header's cells with
+    value_mapping applied (by value first, then by cell colour).
+    """
+    empty = [None] * sheet.row_count
+    columns = {}
+    for db_col in set(request.column_mapping) | set(request.constants):
+        if db_col in request.constants:
+            columns[db_col] = [request.constants[db_col]] * sheet.row_count
             continue
+        header = request.column_mapping[db_col]
+        if not header or header not in sheet.values:
+            continue
+        values = sheet.values[header]
+        col_map = request.value_mapping.get(db_col)
+        if col_map:
+            colors = sheet.color_column(header)
+            values = [_map_value(v, c, col_map) for v, c in zip(values, colors)]
+        columns[db_col] = values
+
+    if "title" in request.constants:
+        titles = [request.constants["title"]] * sheet.row_count
+    else:
+        titles = sheet.values.get(request.column_mapping.get("title"), empty)
+    return titles, columns
+
+
+def _map_value(value, color, col_map: Dict[str, Any]):
+    if value is not None:
+        key = str(value)
+        if key in col_map:
+            return col_map[key]
+    if color:
+        key = str(color)
+        if key in col_map:
+            return col_map[key]
+    return value
+
+
+def _normalize_status(value) -> str:
+    # Simple normalization for statuses that weren't value-mapped
+    if not value:
+        return "backlog"
+    if value in ["backlog", "playing", "finished", "abandoned"]:
+        return value
+    s = str(value).lower()
+    if "finish" in s or "terminado" in s:
+        return "finished"
+    return "backlog"
+
+
+async def run_execute_import(
+    db: AsyncSession,
+    user_id: int,
+    request: ImportRequest,
+    sheet: import_sessions.SheetColumns,
+    progress: Optional[Callable[[int], Awaitable[None]]] = None,
+) -> Dict[str, int]:
+    """
+    Maps sheet rows to games and upserts them into the user's library.
+    progress, if given, is awaited with the index of each row. The header
+    mapping is remembered once every row has been written.
+    """
+    # Get existing games for fuzzy matching
+    existing_games = await crud.get_games(db, user_id=user_id)
+    title_index = import_utils.TitleIndex(existing_games)
+
+    # Writes are collected and applied with crud.bulk_upsert_games
+    pending: List = []
+    pending_ids = set()
+
+    async def flush():
+        nonlocal created_count, updated_count
+        if not pending:
+            return
+        outcomes = await crud.bulk_upsert_games(db, user_id, pending)
+        created_count += sum(1 for o in outcomes if o["action"] == "created")
+        updated_count += sum(1 for o in outcomes if o["action"] == "updated")
+        pending.clear()
+        pending_ids.clear()
 
-        match = import_utils.fuzzy_find_game(str(title_val), existing_games)
-        # print(f"Processing '{title_val}' -> Match: {match.title if match else 'None'}")
-
-        new_data = {}
-        # Iterate over ALL DB columns we care about
-        # We can use the keys from column_mapping or constants
-
-        # Merge keys from both mapping and constants
-        all_keys = set(request.column_mapping.keys()) | set(request.constants.keys())
-
-        for db_col in all_keys:
-            final_val = None
-
-            # 1. Check Constants
-            if db_col in request.constants:
-                final_val = request.constants[db_col]
-
-            # 2. Check Column Mapping
-            elif db_col in request.column_mapping:
-                header = request.column_mapping[db_col]
-                if header and header in row:
-                    cell_data = row[header]
-                    val = (
-                        cell_data.get("v") if isinstance(cell_data, dict) else cell_data
-                    )
-                    color = cell_data.get("c") if isinstance(cell_data, dict) else None
+    created_count = 0
+    updated_count = 0
 
-                    # Value Mapping
-                    mapped_final = val
-                    col_map = request.value_mapping.get(db_col, {})
+    # Mapping is resolved a column at a time; only matching and merging
+    # run per row
+    titles, columns = _map_columns(request, sheet)
+    statuses = [
+        _normalize_status(v) for v in columns.get("status", [None] * len(titles))
+    ]
 
-                    if val is not None and str(val) in col_map:
-                        mapped_final = col_map[str(val)]
-                    elif color and str(color) in col_map:
-                        mapped_final = col_map[str(color)]
+    for idx, title_val in enumerate(titles):
+        if progress is not None:
+            await progress(idx)
 
-                    final_val = mapped_final
+        if not title_val:
+            logger.info(f"Row {idx}: Skipped, no title found")
+            continue
 
-            # If we resolved a value, add it
-            if final_val is not None:
-                new_data[db_col] = final_val
+        match = import_utils.fuzzy_find_game(str(title_val), title_index)
 
-        # Force title
+        new_data = {
+            db_col: values[idx]
+            for db_col, values in columns.items()
+            if values[idx] is not None
+        }
         new_data["title"] = str(title_val)
 
+        if match and match.id in pending_ids:
+            # Same game twice in the sheet: apply the earlier row first so
+            # the merge strategy sees its values
+            await flush()
+
         if match:
             # UPDATE
             update_payload = {}
@@ -201,34 +376,32 @@ async def execute_import(
             if update_payload:
                 try:
                     game_update = schemas.GameUpdate(**update_payload)
-                    await crud.update_game(db, match.id, game_update, current_user.id)
-                    updated_count += 1
                 except Exception:
-                    pass
+                    continue
+                pending.append((match.id, game_update))
+                pending_ids.add(match.id)
         else:
             # CREATE
-            if "status" not in new_data or not new_data["status"]:
-                new_data["status"] = "backlog"
-
-            # Simple normalization if not mapped
-            if new_data["status"] not in [
-                "backlog",
-                "playing",
-                "finished",
-                "abandoned",
-            ]:
-                s = str(new_data["status"]).lower()
-                if "finish" in s or "terminado" in s:
-                    new_data["status"] = "finished"
-                else:
-                    new_data["status"] = "backlog"
+            new_data["status"] = statuses[idx]
 
             try:
                 game_create = schemas.GameCreate(**new_data)
-                await crud.create_user_game(db, game_create, current_user.id)
-                created_count += 1
             except Exception:
-                pass
+                continue
+            pending.append((None, game_create))
+
+    await flush()
+
+    # Only an import that went through teaches the header mapping
+    await crud.save_header_mappings(
+        db,
+        user_id,
+        {
+            db_col: header
+            for db_col, header in request.column_mapping.items()
+            if db_col in import_utils.COLUMN_MAPPING_TARGETS
+        },
+    )
 
     return {"created": created_count, "updated": updated_count}
 
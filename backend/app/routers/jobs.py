@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+import os
+from .. import database, schemas, crud, auth, models, jobs
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+# Seconds between keep-alive comments on an idle event stream
+JOB_EVENTS_HEARTBEAT = float(os.getenv("JOB_EVENTS_HEARTBEAT", "15"))
+
+
+async def _get_user_job(db: AsyncSession, job_id: str, user_id: int):
+    db_job = await crud.get_import_job(db, job_id, user_id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return db_job
+
+
+@router.get("/{job_id}", response_model=schemas.ImportJob)
+async def read_job(
+    job_id: str,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(database.get_db),
+):
+    return await _get_user_job(db, job_id, current_user.id)
+
+
+@router.post("/{job_id}/cancel", response_model=schemas.ImportJob)
+async def cancel_job(
+    job_id: str,
+    response: Response,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(database.get_db),
+):
+    db_job = await _get_user_job(db, job_id, current_user.id)
+    if db_job.status in jobs.TERMINAL_STATUSES:
+        raise HTTPException(status_code=409, detail="Job already finished")
+    if not await jobs.queue.cancel(job_id):
+        # Another process runs the job; it picks the request up on its
+        # next progress report, so the cancel is only accepted for now
+        await crud.request_import_job_cancel(db, job_id)
+        response.status_code = 202
+    await db.refresh(db_job)
+    return db_job
+
+
+@router.get("/{job_id}/events")
+async def job_events(
+    job_id: str,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(database.get_db),
+):
+    """
+    Server-sent events with the job state, sent whenever it changes.
+    The stream ends once the job completes, fails or is cancelled.
+    """
+    await _get_user_job(db, job_id, current_user.id)
+    user_id = current_user.id
+
+    async def stream():
+        last = None
+        while True:
+            # The request's session is closed once streaming starts
+            async with database.AsyncSessionLocal() as session:
+                db_job = await crud.get_import_job(session, job_id, user_id)
+            if db_job is None:
+                return
+            payload = schemas.ImportJob.model_validate(db_job).model_dump_json()
+            if payload != last:
+                yield f"data: {payload}\n\n"
+                last = payload
+            else:
+                yield ": keep-alive\n\n"
+            if db_job.status in jobs.TERMINAL_STATUSES:
+                return
+            await jobs.queue.wait_for_update(job_id, JOB_EVENTS_HEARTBEAT)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
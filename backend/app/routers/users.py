@@ -2,8 +2,11 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Annotated
+import logging
 from .. import database, schemas, crud, auth, models
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/users", tags=["users"])
 
 
@@ -30,25 +33,30 @@ async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: AsyncSession = Depends(database.get_db),
 ):
-    print(f"Login attempt for: {form_data.username}")
+    logger.info("Login attempt", extra={"username": form_data.username})
     user = await crud.get_user_by_username(db, username=form_data.username)
     if not user:
-        print("User not found")
+        logger.info("Login failed: user not found")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Debug password verification
-    is_valid = auth.verify_password(form_data.password, user.password_hash)
-    print(f"Password verification result: {is_valid}")
+    is_valid = await auth.verify_password_async(form_data.password, user.password_hash)
 
     if not is_valid:
+        logger.info("Login failed: wrong password")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    # Transparently upgrade hashes created with a different work factor
+    if auth.password_needs_rehash(user.password_hash):
+        new_hash = await auth.get_password_hash_async(form_data.password)
+        await crud.update_user_password_hash(db, user, new_hash)
+
     access_token = auth.create_access_token(data={"sub": user.username})
     return {"access_token": access_token, "token_type": "bearer"}
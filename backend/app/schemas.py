@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional, List
-from .models import GameStatus, GameProgress
+from pydantic import BaseModel, Field
+from typing import Optional, List, Any, Literal, Union, Annotated
+from datetime import datetime
+from .models import GameStatus, GameProgress, JobStatus
 
 
 # Token
@@ -58,11 +59,97 @@ class GameUpdate(GameBase):
 class Game(GameBase):
     id: int
     user_id: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
 
+# Projected game listing - only id is guaranteed, the rest depend on `fields`
+class GamePartial(BaseModel):
+    id: int
+    user_id: Optional[int] = None
+    title: Optional[str] = None
+    status: Optional[GameStatus] = None
+    hype_score: Optional[int] = None
+    rating: Optional[float] = None
+    progress: Optional[GameProgress] = None
+    playtime_hours: Optional[float] = None
+    finish_year: Optional[int] = None
+    release_year: Optional[int] = None
+    price: Optional[float] = None
+    platform: Optional[str] = None
+    steam_deck: Optional[bool] = None
+    notes: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+# Batch writes - mixed operations applied in one transaction
+class BatchCreate(BaseModel):
+    op: Literal["create"]
+    game: GameCreate
+
+
+class BatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    game: GameUpdate
+
+
+class BatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+class GameBatch(BaseModel):
+    operations: List[
+        Annotated[
+            Union[BatchCreate, BatchUpdate, BatchDelete], Field(discriminator="op")
+        ]
+    ]
+
+
+class BatchResult(BaseModel):
+    op: str
+    # "created" | "updated" | "deleted" | "not_found"
+    status: str
+    id: Optional[int] = None
+    # The game as saved; None for deletes and missing games
+    game: Optional[Game] = None
+
+
+class GameBatchResults(BaseModel):
+    results: List[BatchResult]
+
+
+# Delta sync - games changed and ids deleted since the client's cursor
+class GameChanges(BaseModel):
+    changed: List[Game]
+    deleted: List[int]
+    cursor: str
+    # More changes are waiting; call again with the new cursor
+    has_more: bool = False
+
+
+class StatsBucket(BaseModel):
+    value: Any = None
+    games: int
+
+
+class LibraryStats(BaseModel):
+    total_games: int
+    by_status: List[StatsBucket]
+    by_platform: List[StatsBucket]
+    by_finish_year: List[StatsBucket]
+    by_progress: List[StatsBucket]
+    # None until a game has a rating
+    average_rating: Optional[float] = None
+    total_playtime_hours: float
+    total_spend: float
+
+
 # AI Import - all fields optional except title
 class GameAIImport(BaseModel):
     title: str
@@ -77,3 +164,19 @@ class GameAIImport(BaseModel):
     platform: Optional[str] = None
     steam_deck: Optional[bool] = None
     notes: Optional[str] = None
+
+
+# Background import jobs
+class ImportJob(BaseModel):
+    id: str
+    kind: str
+    status: JobStatus
+    processed: int = 0
+    total: Optional[int] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,91 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+from . import models
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+
+
+class UserCacheBackend:
+    """
+    Interface for caching authenticated user principals by token subject.
+    Methods are async so a shared backend (e.g. Redis) can be plugged in
+    with set_backend() without touching auth.
+    """
+
+    async def get(self, username: str) -> Optional[models.User]:
+        raise NotImplementedError
+
+    async def set(self, username: str, user: models.User) -> None:
+        raise NotImplementedError
+
+    async def delete(self, username: str) -> None:
+        raise NotImplementedError
+
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+
+class InMemoryUserCache(UserCacheBackend):
+    """Per-process TTL + LRU cache."""
+
+    def __init__(
+        self, ttl: float = USER_CACHE_TTL_SECONDS, max_size: int = USER_CACHE_MAX_SIZE
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, tuple[float, models.User]]" = OrderedDict()
+
+    async def get(self, username: str) -> Optional[models.User]:
+        entry = self._entries.get(username)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del self._entries[username]
+            return None
+        self._entries.move_to_end(username)
+        return user
+
+    async def set(self, username: str, user: models.User) -> None:
+        self._entries[username] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(username)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def delete(self, username: str) -> None:
+        self._entries.pop(username, None)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+
+_backend: UserCacheBackend = InMemoryUserCache()
+
+
+def set_backend(backend: UserCacheBackend) -> None:
+    global _backend
+    _backend = backend
+
+
+def principal(user: models.User) -> models.User:
+    # Detached copy without the password hash, safe to share across sessions
+    return models.User(id=user.id, username=user.username, is_admin=user.is_admin)
+
+
+async def get_cached(username: str) -> Optional[models.User]:
+    if USER_CACHE_TTL_SECONDS <= 0:
+        return None
+    return await _backend.get(username)
+
+
+async def store(username: str, user: models.User) -> None:
+    if USER_CACHE_TTL_SECONDS <= 0:
+        return
+    await _backend.set(username, principal(user))
+
+
+async def invalidate(username: str) -> None:
+    await _backend.delete(username)
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import uuid
+
+# Point the app at a scratch database before anything imports it
+_tmpdir = tempfile.mkdtemp()
+DB_PATH = os.path.join(_tmpdir, "test.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+os.environ.setdefault("KIMI_API_KEY", "")
+
+import pytest  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+
+from app import database  # noqa: E402
+
+# Seeded library: big enough that a full scan of games is never the cheap plan
+SEED_USERS = 20
+SEED_GAMES_PER_USER = 200
+
+
+def _seed():
+    con = sqlite3.connect(DB_PATH)
+    con.executemany(
+        "INSERT INTO users (id, username, password_hash, is_admin, library_version)"
+        " VALUES (?, ?, 'x', 0, 0)",
+        [(u, f"seed{u}") for u in range(1, SEED_USERS + 1)],
+    )
+    con.executemany(
+        "INSERT INTO games (user_id, title, status, rating, platform, notes,"
+        " created_at, updated_at)"
+        " VALUES (?, ?, ?, ?, ?, ?, '2026-01-01 00:00:00', '2026-01-01 00:00:00')",
+        [
+            (
+                u,
+                f"Game {u}-{g}",
+                "FINISHED" if g % 3 == 0 else "BACKLOG",
+                g % 10,
+                ("PC", "Switch", "PS5")[g % 3],
+                f"notes for game {g}",
+            )
+            for u in range(1, SEED_USERS + 1)
+            for g in range(SEED_GAMES_PER_USER)
+        ],
+    )
+    con.execute("ANALYZE")
+    con.commit()
+    con.close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def seeded_db():
+    async def migrate():
+        await database.init_db()
+        await database.engine.dispose()
+
+    asyncio.run(migrate())
+    _seed()
+    return DB_PATH
+
+
+@pytest.fixture
+def run_db():
+    """
+    Runs `func(session)` on a fresh engine and returns (result, statements),
+    where statements are the (sql, parameters) the call executed.
+    """
+
+    def run(func):
+        statements = []
+
+        async def main():
+            engine = create_async_engine(os.environ["DATABASE_URL"])
+
+            @event.listens_for(engine.sync_engine, "before_cursor_execute")
+            def _capture(conn, cursor, statement, parameters, context, executemany):
+                statements.append((statement, parameters))
+
+            try:
+                async with AsyncSession(engine, expire_on_commit=False) as session:
+                    return await func(session)
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main()), statements
+
+    return run
+
+
+@pytest.fixture
+def client(seeded_db):
+    """An authenticated TestClient for a fresh user, with `user_id` set."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    username = f"user{uuid.uuid4().hex[:8]}"
+    with TestClient(app) as c:
+        c.post("/users/", json={"username": username, "password": "secret"})
+        token = c.post(
+            "/users/token", data={"username": username, "password": "secret"}
+        ).json()["access_token"]
+        c.headers["Authorization"] = f"Bearer {token}"
+        c.user_id = c.get("/users/me").json()["id"]
+        yield c
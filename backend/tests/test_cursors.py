@@ -0,0 +1,89 @@
+"""Pagination cursors: following them walks every row, and tampered ones are a 400."""
+
+import base64
+import json
+
+import pytest
+
+
+def raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+@pytest.fixture
+def library(client):
+    for i, rating in enumerate([7.5, None, 9, 7.5, 3.25, None]):
+        client.post("/games/", json={"title": f"Game {i}", "rating": rating})
+    return client
+
+
+@pytest.mark.parametrize("sort", ["id", "title", "rating"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_listing_cursor_walks_all_rows(library, sort, order):
+    params = {"sort": sort, "order": order}
+    expected = [g["id"] for g in library.get("/games/", params=params).json()]
+    seen, cursor = [], None
+    while True:
+        page = library.get("/games/", params={**params, "limit": 2, "cursor": cursor})
+        seen += [g["id"] for g in page.json()]
+        cursor = page.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == expected
+
+
+def test_listing_cursor_is_tied_to_sort(library):
+    page = library.get("/games/", params={"sort": "rating", "limit": 2})
+    cursor = page.headers["X-Next-Cursor"]
+    for params in ({"sort": "title"}, {"sort": "rating", "order": "desc"}):
+        response = library.get("/games/", params={**params, "cursor": cursor})
+        assert response.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "sort, cursor",
+    [
+        ("rating", raw_cursor([["a"], 1])),
+        ("rating", raw_cursor([["rating", "asc", "high"], 1])),
+        ("rating", raw_cursor([["rating", "asc", 5.0], "1"])),
+        ("title", raw_cursor([["title", "asc", 5], 1])),
+        ("id", raw_cursor([["id", "asc", None], 1])),
+        ("id", raw_cursor([["id", "asc", 1.5], 1])),
+        ("id", "not base64!"),
+    ],
+)
+def test_malformed_listing_cursor_is_rejected(client, sort, cursor):
+    response = client.get("/games/", params={"sort": sort, "cursor": cursor})
+    assert response.status_code == 400
+
+
+def test_search_cursor_walks_all_hits(library):
+    expected = [
+        g["id"] for g in library.get("/games/search", params={"q": "game"}).json()
+    ]
+    seen, cursor = [], None
+    while True:
+        page = library.get(
+            "/games/search", params={"q": "game", "limit": 2, "cursor": cursor}
+        )
+        seen += [g["id"] for g in page.json()]
+        cursor = page.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == expected and len(seen) == 6
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        raw_cursor(["high", 1]),
+        raw_cursor([None, 1]),
+        raw_cursor([[1.0], 1]),
+        raw_cursor([True, 1]),
+        raw_cursor([1.0, "1"]),
+        raw_cursor([1.0, 1.5]),
+    ],
+)
+def test_malformed_search_cursor_is_rejected(client, cursor):
+    response = client.get("/games/search", params={"q": "game", "cursor": cursor})
+    assert response.status_code == 400
@@ -0,0 +1,74 @@
+"""
+The per-user library version behind the game ETags is bumped by every
+crud write, so a client holding an older ETag gets the new data.
+"""
+
+import sqlite3
+
+import pytest
+
+
+def library_version(db_path: str, user_id: int) -> int:
+    con = sqlite3.connect(db_path)
+    try:
+        return con.execute(
+            "SELECT library_version FROM users WHERE id = ?", (user_id,)
+        ).fetchone()[0]
+    finally:
+        con.close()
+
+
+@pytest.fixture
+def game(client):
+    return client.post("/games/", json={"title": "Hollow Knight"}).json()
+
+
+def test_create_bumps_version(client, seeded_db):
+    before = library_version(seeded_db, client.user_id)
+    client.post("/games/", json={"title": "Celeste"})
+    assert library_version(seeded_db, client.user_id) == before + 1
+
+
+def test_update_bumps_version(client, seeded_db, game):
+    before = library_version(seeded_db, client.user_id)
+    client.put(f"/games/{game['id']}", json={"rating": 9})
+    assert library_version(seeded_db, client.user_id) == before + 1
+
+
+def test_delete_bumps_version(client, seeded_db, game):
+    before = library_version(seeded_db, client.user_id)
+    client.delete(f"/games/{game['id']}")
+    assert library_version(seeded_db, client.user_id) == before + 1
+
+
+def test_bulk_delete_bumps_version(client, seeded_db, game):
+    client.post("/games/", json={"title": "Celeste"})
+    before = library_version(seeded_db, client.user_id)
+    client.delete("/games/")
+    assert library_version(seeded_db, client.user_id) == before + 1
+
+
+def test_current_etag_is_not_modified(client, game):
+    for url in ("/games/", f"/games/{game['id']}"):
+        etag = client.get(url).headers["etag"]
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+
+
+@pytest.mark.parametrize(
+    "write",
+    [
+        lambda c, g: c.post("/games/", json={"title": "Celeste"}),
+        lambda c, g: c.put(f"/games/{g['id']}", json={"rating": 9}),
+        lambda c, g: c.delete(f"/games/{g['id']}"),
+        lambda c, g: c.delete("/games/"),
+    ],
+    ids=["create", "update", "delete", "bulk_delete"],
+)
+def test_stale_etag_gets_new_list(client, game, write):
+    etag = client.get("/games/").headers["etag"]
+    write(client, game)
+    response = client.get("/games/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
@@ -0,0 +1,75 @@
+"""Header mappings are learned only from imports that went through."""
+
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from app import crud, user_cache
+
+IMPORT = {
+    "sheet_name": "Sheet1",
+    "column_mapping": {"title": "Juego", "rating": "Nota"},
+    "merge_strategy": "overwrite",
+    "data": [{"Juego": "Celeste", "Nota": 9}, {"Juego": "Hades", "Nota": 10}],
+}
+
+
+@pytest.fixture
+def admin(client, seeded_db):
+    con = sqlite3.connect(seeded_db)
+    try:
+        con.execute("UPDATE users SET is_admin = 1 WHERE id = ?", (client.user_id,))
+        con.commit()
+    finally:
+        con.close()
+    username = client.get("/users/me").json()["username"]
+    asyncio.run(user_cache.invalidate(username))
+    return client
+
+
+@pytest.fixture
+def failing_upsert(monkeypatch):
+    async def fail(*args, **kwargs):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(crud, "bulk_upsert_games", fail)
+
+
+def header_mappings(run_db, user_id):
+    mappings, _ = run_db(lambda db: crud.get_header_mappings(db, user_id))
+    return mappings
+
+
+def wait_for_job(client, job_id):
+    for _ in range(100):
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("completed", "failed", "cancelled"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+@pytest.mark.parametrize("background", [False, True])
+def test_successful_import_saves_mapping(admin, run_db, background):
+    response = admin.post("/import/execute", json={**IMPORT, "background": background})
+    assert response.status_code == 200
+    if background:
+        assert wait_for_job(admin, response.json()["job_id"])["status"] == "completed"
+    assert header_mappings(run_db, admin.user_id) == {
+        "title": "Juego",
+        "rating": "Nota",
+    }
+
+
+def test_failed_import_keeps_previous_mapping(admin, run_db, failing_upsert):
+    with pytest.raises(RuntimeError):
+        admin.post("/import/execute", json=IMPORT)
+    assert header_mappings(run_db, admin.user_id) == {}
+
+
+def test_failed_background_import_keeps_previous_mapping(admin, run_db, failing_upsert):
+    response = admin.post("/import/execute", json={**IMPORT, "background": True})
+    assert wait_for_job(admin, response.json()["job_id"])["status"] == "failed"
+    assert header_mappings(run_db, admin.user_id) == {}
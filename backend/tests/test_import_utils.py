@@ -0,0 +1,33 @@
+"""Telling spreadsheets, CSV files and web pages apart on import."""
+
+import pytest
+
+from app import import_utils
+
+
+@pytest.mark.parametrize(
+    "head, content_type, expected",
+    [
+        (b"PK\x03\x04rest", None, "excel"),
+        (b"PK\x03\x04rest", "text/html", "excel"),
+        (b"title,rating\nCeleste,9\n", None, "csv"),
+        (b"title;rating\n", "text/csv", "csv"),
+        (b"title\trating\n", "text/plain; charset=utf-8", "csv"),
+    ],
+)
+def test_sniff_format(head, content_type, expected):
+    assert import_utils.sniff_format(head, content_type) == expected
+
+
+@pytest.mark.parametrize(
+    "head, content_type",
+    [
+        (b"title,rating\n", "text/html; charset=utf-8"),
+        (b"<!DOCTYPE html><html>", None),
+        (b"\xef\xbb\xbf\n  <html lang='en'>", "text/plain"),
+        (b"<HTML><body>Sign in</body>", "application/octet-stream"),
+    ],
+)
+def test_sniff_format_rejects_web_pages(head, content_type):
+    with pytest.raises(ValueError):
+        import_utils.sniff_format(head, content_type)
@@ -0,0 +1,152 @@
+"""In-process job queue: cleanup, ownership and cancellation."""
+
+import asyncio
+from datetime import timedelta
+
+from app import crud, database, jobs, models
+
+
+def run(coro_func):
+    async def main():
+        try:
+            return await coro_func()
+        finally:
+            await database.engine.dispose()
+
+    return asyncio.run(main())
+
+
+async def _block(ctx):
+    await asyncio.Event().wait()
+
+
+def test_cleanup_runs_for_job_cancelled_while_queued(seeded_db):
+    cleaned = []
+
+    async def scenario():
+        queue = jobs.InProcessJobQueue(workers=1)
+        await queue.submit("running", _block)
+        await queue.submit("waiting", _block, lambda: cleaned.append("waiting"))
+        await asyncio.sleep(0.05)
+        assert cleaned == []
+        await queue.cancel("waiting")
+        await asyncio.sleep(0)
+        assert cleaned == ["waiting"]
+        await queue.stop()
+
+    run(scenario)
+
+
+def test_cleanup_runs_on_shutdown(seeded_db):
+    cleaned = []
+
+    async def scenario():
+        queue = jobs.InProcessJobQueue(workers=1)
+        for job_id in ("a", "b", "c"):
+            await queue.submit(job_id, _block, lambda j=job_id: cleaned.append(j))
+        await asyncio.sleep(0.05)
+        await queue.stop()
+        await asyncio.sleep(0)
+
+    run(scenario)
+    assert sorted(cleaned) == ["a", "b", "c"]
+
+
+def test_start_fails_only_stale_jobs(seeded_db):
+    async def scenario():
+        async with database.AsyncSessionLocal() as db:
+            await crud.create_import_job(db, "dead", 1, "execute", owner="gone:1")
+            await crud.create_import_job(db, "alive", 1, "execute", owner="other:2")
+            dead = await crud.get_import_job(db, "dead")
+            dead.updated_at = models.utcnow() - timedelta(
+                seconds=jobs.JOB_STALE_AFTER + 60
+            )
+            await db.commit()
+
+        queue = jobs.InProcessJobQueue()
+        await queue.start()
+        await queue.stop()
+
+        async with database.AsyncSessionLocal() as db:
+            dead = await crud.get_import_job(db, "dead")
+            alive = await crud.get_import_job(db, "alive")
+            return dead.status, alive.status
+
+    dead, alive = run(scenario)
+    assert dead == models.JobStatus.FAILED
+    assert alive == models.JobStatus.QUEUED
+
+
+def test_heartbeat_keeps_own_jobs_fresh(seeded_db, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_HEARTBEAT_INTERVAL", 0.01)
+
+    async def scenario():
+        queue = jobs.InProcessJobQueue()
+        async with database.AsyncSessionLocal() as db:
+            await crud.create_import_job(
+                db, "mine", 1, "execute", owner=queue.instance_id
+            )
+            job = await crud.get_import_job(db, "mine")
+            job.updated_at = models.utcnow() - timedelta(seconds=10)
+            await db.commit()
+            await db.refresh(job)
+            before = job.updated_at
+
+        await queue.start()
+        await asyncio.sleep(0.1)
+        await queue.stop()
+
+        async with database.AsyncSessionLocal() as db:
+            job = await crud.get_import_job(db, "mine")
+            return before, job.updated_at, job.status
+
+    before, after, status = run(scenario)
+    assert after > before
+    assert status == models.JobStatus.QUEUED
+
+
+async def _count(ctx):
+    for i in range(1000):
+        await ctx.report(i, 1000)
+        await asyncio.sleep(0.01)
+
+
+def test_cancel_requested_in_db_stops_running_job(seeded_db, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_PROGRESS_INTERVAL", 0)
+
+    async def scenario():
+        queue = jobs.InProcessJobQueue()
+        async with database.AsyncSessionLocal() as db:
+            await crud.create_import_job(db, "remote", 1, "execute")
+        await queue.submit("remote", _count)
+        await asyncio.sleep(0.05)
+        async with database.AsyncSessionLocal() as db:
+            await crud.request_import_job_cancel(db, "remote")
+        await asyncio.sleep(0.1)
+        async with database.AsyncSessionLocal() as db:
+            job = await crud.get_import_job(db, "remote")
+        await queue.stop()
+        return job.status, job.processed
+
+    status, processed = run(scenario)
+    assert status == models.JobStatus.CANCELLED
+    assert processed < 1000
+
+
+def test_cancel_of_job_run_elsewhere_is_accepted(client):
+    async def create():
+        async with database.AsyncSessionLocal() as db:
+            await crud.create_import_job(
+                db, "elsewhere", client.user_id, "execute", owner="other:2"
+            )
+
+    run(create)
+    response = client.post("/jobs/elsewhere/cancel")
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+
+    async def flag():
+        async with database.AsyncSessionLocal() as db:
+            return await crud.is_import_job_cancel_requested(db, "elsewhere")
+
+    assert run(flag)
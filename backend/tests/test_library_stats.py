@@ -0,0 +1,99 @@
+"""
+The running library_stats totals kept by the crud writes match a fresh
+GROUP BY over the user's games after a mix of writes.
+"""
+
+import sqlite3
+
+from app import models
+
+GAMES = [
+    {"title": "Celeste", "status": "finished", "rating": 9, "platform": "PC"},
+    {"title": "Hades", "rating": 9.5, "playtime_hours": 60.5, "platform": "Switch"},
+    {"title": "Outer Wilds", "finish_year": 2024, "price": 24.99},
+    {"title": "Tunic", "progress": "A MEDIAS", "platform": "PC", "price": 29.99},
+    {"title": "Inside", "status": "finished", "finish_year": 2023, "rating": 7},
+    {"title": "Hollow Knight", "playtime_hours": 42, "steam_deck": True},
+]
+
+
+def buckets(pairs) -> list:
+    # None (no value) sorts first
+    return sorted(pairs, key=lambda b: (b[0] is not None, str(b[0])))
+
+
+DIMENSIONS = {
+    "status": lambda v: models.GameStatus[v].value,
+    "platform": lambda v: v,
+    "finish_year": lambda v: v,
+    "progress": lambda v: models.GameProgress[v].value,
+}
+
+
+def aggregate(db_path: str, user_id: int) -> dict:
+    con = sqlite3.connect(db_path)
+    try:
+        total, average, playtime, spend = con.execute(
+            "SELECT COUNT(*), AVG(rating), COALESCE(SUM(playtime_hours), 0),"
+            " COALESCE(SUM(price), 0) FROM games WHERE user_id = ?",
+            (user_id,),
+        ).fetchone()
+        stats = {
+            "total_games": total,
+            "average_rating": round(average, 2) if average is not None else None,
+            "total_playtime_hours": round(playtime, 2),
+            "total_spend": round(spend, 2),
+        }
+        for dimension, to_value in DIMENSIONS.items():
+            rows = con.execute(
+                f"SELECT {dimension}, COUNT(*) FROM games WHERE user_id = ?"
+                f" GROUP BY {dimension}",
+                (user_id,),
+            ).fetchall()
+            stats[f"by_{dimension}"] = buckets(
+                (to_value(v) if v is not None else None, n) for v, n in rows
+            )
+    finally:
+        con.close()
+    return stats
+
+
+def served(client) -> dict:
+    stats = client.get("/games/stats").json()
+    for dimension in DIMENSIONS:
+        stats[f"by_{dimension}"] = buckets(
+            (b["value"], b["games"]) for b in stats[f"by_{dimension}"]
+        )
+    return stats
+
+
+def test_stats_match_group_by_after_mixed_writes(client, seeded_db):
+    ids = [client.post("/games/", json=game).json()["id"] for game in GAMES]
+    assert served(client) == aggregate(seeded_db, client.user_id)
+
+    client.put(f"/games/{ids[1]}", json={"status": "finished", "finish_year": 2024})
+    client.put(f"/games/{ids[0]}", json={"status": "backlog", "rating": 6.5})
+    client.put(f"/games/{ids[3]}", json={"platform": "Switch", "progress": None})
+    client.delete(f"/games/{ids[4]}")
+    assert served(client) == aggregate(seeded_db, client.user_id)
+
+    batch = client.post(
+        "/games/batch",
+        json={
+            "operations": [
+                {"op": "create", "game": {"title": "Celeste", "price": 19.99}},
+                {"op": "update", "id": ids[2], "game": {"status": "finished"}},
+                {"op": "update", "id": ids[5], "game": {"playtime_hours": 50}},
+                {"op": "delete", "id": ids[1]},
+                {"op": "delete", "id": ids[4]},
+            ]
+        },
+    )
+    assert [r["status"] for r in batch.json()["results"]] == [
+        "created",
+        "updated",
+        "updated",
+        "deleted",
+        "not_found",
+    ]
+    assert served(client) == aggregate(seeded_db, client.user_id)
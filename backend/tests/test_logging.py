@@ -0,0 +1,65 @@
+"""
+Logging survives app lifespans ending and starting again, and slow
+query logs leave bound parameters out unless asked for.
+"""
+
+import logging
+import logging.handlers
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app import observability
+from app.main import app
+
+
+def test_each_lifespan_has_a_running_listener(seeded_db):
+    root = logging.getLogger()
+    observability.stop_logging()
+    before = root.handlers[:]
+
+    for _ in range(2):
+        with TestClient(app):
+            assert observability._listener is not None
+            assert any(
+                isinstance(h, logging.handlers.QueueHandler) for h in root.handlers
+            )
+        # No QueueHandler is left writing to a queue nobody reads
+        assert observability._listener is None
+        assert root.handlers == before
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(observability, "SLOW_QUERY_MS", 0)
+    engine = create_engine("sqlite://")
+    observability.instrument_engine(engine)
+    yield engine
+    engine.dispose()
+
+
+def slow_query_params(caplog, engine):
+    with caplog.at_level(logging.WARNING, logger="app.db"):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT :password_hash"), {"password_hash": "$2b$12$x"})
+    (record,) = [r for r in caplog.records if r.getMessage() == "Slow query"]
+    return getattr(record, "parameters", None)
+
+
+def test_slow_query_log_leaves_out_parameters(caplog, engine):
+    assert slow_query_params(caplog, engine) is None
+
+
+def test_slow_query_log_parameters_on_request(caplog, engine, monkeypatch):
+    monkeypatch.setattr(observability, "LOG_QUERY_PARAMS", True)
+    assert "$2b$12$x" in slow_query_params(caplog, engine)
+
+
+def test_failed_statement_leaves_no_start_time(engine):
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing"))
+        assert conn.info["query_start"] == []
@@ -0,0 +1,50 @@
+"""
+bcrypt runs in a thread pool, so a burst of logins must not stall other
+requests on the event loop.
+"""
+
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app import auth
+
+LOGINS = 8
+PROBES = 50
+
+
+def test_login_burst_keeps_other_requests_fast(client):
+    username = f"burst{uuid.uuid4().hex[:8]}"
+    client.post("/users/", json={"username": username, "password": "secret"})
+
+    # What one bcrypt check costs; a blocked loop would add about this much
+    started = time.perf_counter()
+    auth.verify_password("wrong", auth.get_password_hash("secret"))
+    hash_time = (time.perf_counter() - started) / 2
+
+    burst_over = threading.Event()
+
+    def login(_):
+        return client.post(
+            "/users/token", data={"username": username, "password": "wrong"}
+        ).status_code
+
+    def probe():
+        latencies = []
+        while len(latencies) < PROBES or not burst_over.is_set():
+            started = time.perf_counter()
+            assert client.get("/users/me").status_code == 200
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    with ThreadPoolExecutor(max_workers=LOGINS + 1) as pool:
+        probing = pool.submit(probe)
+        codes = list(pool.map(login, range(LOGINS)))
+        burst_over.set()
+        latencies = probing.result()
+
+    assert codes == [401] * LOGINS
+    p99 = statistics.quantiles(latencies, n=100)[98]
+    assert p99 < hash_time, f"p99 {p99:.3f}s, one bcrypt check {hash_time:.3f}s"
@@ -0,0 +1,136 @@
+"""
+Every crud query touching per-user tables must be served by an index.
+Each call runs against the seeded database; its statements are then
+re-run under EXPLAIN QUERY PLAN and the test fails on a full table scan.
+"""
+
+import re
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from app import crud, models, schemas
+
+# "SCAN games" (or "SCAN games USING INDEX ...") reads the whole table;
+# "SEARCH" is an index lookup. games_fts is the FTS5 index itself.
+FULL_SCAN = re.compile(
+    r"^SCAN (users|games|game_tombstones|library_stats|header_mappings)\b(?!_)"
+)
+
+
+READS = {
+    "get_user": lambda db, first_id: crud.get_user(db, 1),
+    "get_user_by_username": lambda db, first_id: crud.get_user_by_username(db, "seed1"),
+    "get_games": lambda db, first_id: crud.get_games(db, user_id=1),
+    "get_games_status": lambda db, first_id: crud.get_games(
+        db, user_id=1, status=models.GameStatus.FINISHED
+    ),
+    "get_games_page_id": lambda db, first_id: crud.get_games_page(
+        db, user_id=1, limit=50
+    ),
+    "get_games_page_id_cursor": lambda db, first_id: crud.get_games_page(
+        db, user_id=1, limit=50, cursor=crud.encode_page_cursor("id", False, 50, 50)
+    ),
+    "get_games_page_title": lambda db, first_id: crud.get_games_page(
+        db, user_id=1, sort="title", limit=50
+    ),
+    "get_games_page_rating_desc_cursor": lambda db, first_id: crud.get_games_page(
+        db,
+        user_id=1,
+        sort="rating",
+        descending=True,
+        limit=50,
+        cursor=crud.encode_page_cursor("rating", True, 5.0, 100),
+    ),
+    "get_games_page_status_fields": lambda db, first_id: crud.get_games_page(
+        db,
+        user_id=1,
+        status=models.GameStatus.BACKLOG,
+        fields=["title", "rating"],
+        limit=50,
+    ),
+    "get_game": lambda db, first_id: crud.get_game(db, first_id(1), 1),
+    "search_games": lambda db, first_id: crud.search_games(
+        db, user_id=1, q="game not", limit=10
+    ),
+    "get_library_version": lambda db, first_id: crud.get_library_version(db, 1),
+    "get_library_stats": lambda db, first_id: crud.get_library_stats(db, 1),
+    "get_game_changes": lambda db, first_id: crud.get_game_changes(
+        db, user_id=1, limit=100
+    ),
+    "get_game_changes_cursor": lambda db, first_id: crud.get_game_changes(
+        db, user_id=1, cursor=crud.encode_sync_cursor(datetime(2026, 1, 1)), limit=100
+    ),
+    "get_header_mappings": lambda db, first_id: crud.get_header_mappings(db, 1),
+}
+
+# Each write works on its own user so the tests don't depend on order
+WRITES = {
+    "create_user_game": lambda db, first_id: crud.create_user_game(
+        db, schemas.GameCreate(title="New game"), user_id=2
+    ),
+    "update_game": lambda db, first_id: crud.update_game(
+        db, first_id(3), schemas.GameUpdate(rating=7, notes="replayed"), 3
+    ),
+    "delete_game": lambda db, first_id: crud.delete_game(db, first_id(4), 4),
+    "delete_user_games": lambda db, first_id: crud.delete_user_games(db, 5),
+    "apply_game_batch": lambda db, first_id: crud.apply_game_batch(
+        db,
+        6,
+        [
+            ("create", None, schemas.GameCreate(title="Batch game")),
+            ("update", first_id(6), schemas.GameUpdate(platform="PC")),
+            ("delete", first_id(6) + 1, None),
+        ],
+    ),
+}
+
+
+@pytest.fixture
+def first_id(seeded_db):
+    """Returns the lowest game id of a seeded user."""
+
+    def lookup(user_id: int) -> int:
+        con = sqlite3.connect(seeded_db)
+        try:
+            return con.execute(
+                "SELECT MIN(id) FROM games WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+        finally:
+            con.close()
+
+    return lookup
+
+
+def explain(db_path: str, statement: str, parameters) -> list:
+    con = sqlite3.connect(db_path)
+    try:
+        rows = con.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    finally:
+        con.close()
+    return [row[-1] for row in rows]
+
+
+def assert_indexed(db_path: str, statements):
+    checked = 0
+    for statement, parameters in statements:
+        if not re.match(r"\s*(SELECT|UPDATE|DELETE|INSERT .* SELECT)", statement, re.S):
+            continue
+        checked += 1
+        plan = explain(db_path, statement, parameters)
+        scans = [step for step in plan if FULL_SCAN.match(step)]
+        assert not scans, f"full table scan {scans} in:\n{statement}\nplan: {plan}"
+    assert checked, "no queries were captured"
+
+
+@pytest.mark.parametrize("name", READS)
+def test_read_uses_index(run_db, seeded_db, first_id, name):
+    _, statements = run_db(lambda db: READS[name](db, first_id))
+    assert_indexed(seeded_db, statements)
+
+
+@pytest.mark.parametrize("name", WRITES)
+def test_write_uses_index(run_db, seeded_db, first_id, name):
+    _, statements = run_db(lambda db: WRITES[name](db, first_id))
+    assert_indexed(seeded_db, statements)
@@ -0,0 +1,54 @@
+"""
+Authenticated requests are served from the principal cache after the
+first lookup, and changes to the user drop the cached principal.
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+from app import crud, database, user_cache
+
+
+@pytest.fixture
+def user_lookups():
+    """Statements the app runs to load a user by username."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "users.username =" in statement:
+            statements.append(statement)
+
+    event.listen(database.engine.sync_engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(database.engine.sync_engine, "before_cursor_execute", capture)
+
+
+@pytest.fixture
+def cold_client(client):
+    client.username = client.get("/users/me").json()["username"]
+    asyncio.run(user_cache.invalidate(client.username))
+    return client
+
+
+def test_cache_skips_user_query_after_first_hit(cold_client, user_lookups):
+    for _ in range(5):
+        assert cold_client.get("/games/").status_code == 200
+    assert len(user_lookups) == 1
+
+
+def test_password_change_invalidates_cache(cold_client, user_lookups, run_db):
+    cold_client.get("/games/")
+    assert asyncio.run(user_cache.get_cached(cold_client.username)) is not None
+
+    async def change_password(db):
+        db_user = await crud.get_user(db, cold_client.user_id)
+        await crud.update_user_password_hash(db, db_user, db_user.password_hash)
+
+    run_db(change_password)
+    assert asyncio.run(user_cache.get_cached(cold_client.username)) is None
+
+    cold_client.get("/games/")
+    cold_client.get("/games/")
+    assert len(user_lookups) == 2
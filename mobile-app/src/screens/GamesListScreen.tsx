@@ -2,33 +2,27 @@ import React, { useEffect, useState, useCallback } from 'react';
 import { View, FlatList, StyleSheet } from 'react-native';
 import { Text, Card, FAB, ActivityIndicator } from 'react-native-paper';
 import { useFocusEffect, useNavigation, useRoute } from '@react-navigation/native';
-import client from '../api/client';
 import i18n from '../i18n';
 import { useAuthStore } from '../store/useAuthStore';
-
-type Game = {
-    id: number;
-    title: string;
-    status: string;
-    hype_score?: number;
-    rating?: number;
-};
+import { useGamesStore, Game } from '../store/useGamesStore';
 
 export default function GamesListScreen() {
     const route = useRoute<any>();
     const navigation = useNavigation<any>();
     const mode = route.params?.mode || 'backlog'; // 'backlog' or 'finished'
-    const [games, setGames] = useState<Game[]>([]);
     const [loading, setLoading] = useState(true);
     const { user } = useAuthStore();
+    const { games: gamesById, sync } = useGamesStore();
+    const statusParam = mode === 'backlog' ? 'backlog' : 'finished';
+    const games = Object.values(gamesById)
+        .filter(game => game.status === statusParam)
+        .sort((a, b) => a.id - b.id);
 
     const fetchGames = async () => {
         if (!user) return;
         setLoading(true);
         try {
-            const statusParam = mode === 'backlog' ? 'backlog' : 'finished';
-            const res = await client.get(`/games/?status=${statusParam}`);
-            setGames(res.data);
+            await sync(user.username);
         } catch (error) {
             console.error(error);
         } finally {
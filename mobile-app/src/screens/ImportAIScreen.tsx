@@ -8,7 +8,7 @@ import { useNavigation } from '@react-navigation/native';
 
 type SheetInfo = {
     sheet_name: string;
-    row_count: number;
+    row_count: number | null; // approximate in metadata_only mode
     headers: string[];
 };
 
@@ -42,6 +42,8 @@ export default function ImportAIScreen() {
     const [titleColumn, setTitleColumn] = useState<string | null>(null);
     const [instructions, setInstructions] = useState<string>("");
     const abortControllerRef = React.useRef<AbortController | null>(null);
+    const jobIdRef = React.useRef<string | null>(null);
+    const [jobProgress, setJobProgress] = useState<{ processed: number; total: number | null } | null>(null);
 
     // Results
     const [results, setResults] = useState<{
@@ -80,6 +82,8 @@ export default function ImportAIScreen() {
                 name: asset.name,
                 type: asset.mimeType || 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
             } as any);
+            // Only sheet names and headers are needed here
+            formData.append('metadata_only', 'true');
 
             const res = await client.post('/import/ai/analyze', formData, {
                 headers: { 'Content-Type': 'multipart/form-data' },
@@ -116,16 +120,29 @@ export default function ImportAIScreen() {
             formData.append('processing_strategy', strategy);
             if (titleColumn) formData.append('title_column', titleColumn);
             if (instructions) formData.append('extra_instructions', instructions);
+            // Run as a background job and follow its progress
+            formData.append('background', 'true');
 
-            // Using standard HTTP request - for long files this might verify timeout vs sockets
-            // But for reasonable sizes it works.
+            const signal = abortControllerRef.current.signal;
             const res = await client.post('/import/ai/upload', formData, {
                 headers: { 'Content-Type': 'multipart/form-data' },
-                timeout: 3600000, // 1 hour
-                signal: abortControllerRef.current.signal
+                signal
             });
+            jobIdRef.current = res.data.job_id;
+            setJobProgress({ processed: 0, total: null });
+
+            let job = res.data;
+            while (true) {
+                await new Promise(resolve => setTimeout(resolve, 1000));
+                if (signal.aborted) throw new Error('canceled');
+                job = (await client.get(`/jobs/${jobIdRef.current}`, { signal })).data;
+                setJobProgress({ processed: job.processed, total: job.total });
+                if (job.status === 'completed') break;
+                if (job.status === 'cancelled') throw new Error('canceled');
+                if (job.status === 'failed') throw new Error(job.error || 'Job failed');
+            }
 
-            const data = res.data;
+            const data = job.result;
             setResults(data);
 
             if (data.conflicts && data.conflicts.length > 0) {
@@ -151,10 +168,15 @@ export default function ImportAIScreen() {
         } finally {
             setLoading(false);
             abortControllerRef.current = null;
+            jobIdRef.current = null;
+            setJobProgress(null);
         }
     };
 
     const handleCancel = () => {
+        if (jobIdRef.current) {
+            client.post(`/jobs/${jobIdRef.current}/cancel`).catch(() => {});
+        }
         if (abortControllerRef.current) {
             abortControllerRef.current.abort();
         }
@@ -276,7 +298,7 @@ export default function ImportAIScreen() {
                         }}>
                             <Card.Title
                                 title={sheet.sheet_name}
-                                subtitle={`${sheet.row_count} filas detected`}
+                                subtitle={`~${sheet.row_count ?? '?'} filas detected`}
                                 left={(props) => <Text {...props} variant="titleLarge">📄</Text>}
                             />
                         </Card>
@@ -384,7 +406,20 @@ export default function ImportAIScreen() {
                         Esto puede tomar unos minutos dependiendo del número de filas.
                         La IA está leyendo tu Excel...
                     </Text>
-                    <ProgressBar indeterminate visible={true} style={{ width: 200, marginBottom: 30 }} />
+                    {jobProgress && jobProgress.total ? (
+                        <>
+                            <ProgressBar
+                                progress={Math.min(jobProgress.processed / jobProgress.total, 1)}
+                                visible={true}
+                                style={{ width: 200, marginBottom: 10 }}
+                            />
+                            <Text style={{ marginBottom: 30 }}>
+                                {jobProgress.processed} / {jobProgress.total}
+                            </Text>
+                        </>
+                    ) : (
+                        <ProgressBar indeterminate visible={true} style={{ width: 200, marginBottom: 30 }} />
+                    )}
 
                     <Button
                         mode="outlined"
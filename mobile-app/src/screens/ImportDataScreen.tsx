@@ -44,7 +44,8 @@ export default function ImportDataScreen() {
     const [selectedSheet, setSelectedSheet] = useState<SheetAnalysis | null>(null);
     const [mapping, setMapping] = useState<Record<string, string | null>>({});
     const [mergeStrategy, setMergeStrategy] = useState('fill');
-    const [sheetRows, setSheetRows] = useState<Record<string, any[]>>({});
+    const [sessionId, setSessionId] = useState<string | null>(null);
+    const [columnValues, setColumnValues] = useState<{ type: 'value' | 'color', val: string, count: number }[]>([]);
     const [valueMapping, setValueMapping] = useState<Record<string, Record<string, any>>>({});
     const [mappingModalVisible, setMappingModalVisible] = useState(false);
     const [headerModalVisible, setHeaderModalVisible] = useState(false);
@@ -75,13 +76,15 @@ export default function ImportDataScreen() {
                 name: fileAsset.name,
                 type: fileAsset.mimeType || 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
             } as any);
+            // Rows stay on the server, referenced by session_id
+            formData.append('include_rows', 'false');
 
             const res = await client.post('/import/analyze', formData, {
                 headers: { 'Content-Type': 'multipart/form-data' },
             });
 
             setAnalysis(res.data.results);
-            setSheetRows(res.data.rows_map);
+            setSessionId(res.data.session_id);
             setStep(2);
         } catch (e) {
             Alert.alert("Error", "Could not analyze file");
@@ -106,40 +109,18 @@ export default function ImportDataScreen() {
         setStep(3);
     };
 
-    // Helper to get unique values and colors for a selected header
-    const getUniqueValues = (header: string) => {
-        if (!selectedSheet) return [];
-        const rows = sheetRows[selectedSheet.sheet_name] || [];
-        const unique = new Set<string>();
-        const values: { type: 'value' | 'color', val: string, count: number }[] = [];
-
-        // Count frequencies
-        const counts: Record<string, number> = {};
-
-        rows.forEach(row => {
-            const cell = row[header];
-            if (!cell) return;
-
-            // Value
-            if (cell.v !== null && cell.v !== "") {
-                const k = `value:${cell.v}`;
-                counts[k] = (counts[k] || 0) + 1;
-            }
-            // Color
-            if (cell.c !== null) {
-                const k = `color:${cell.c}`;
-                counts[k] = (counts[k] || 0) + 1;
-            }
-        });
-
-        Object.keys(counts).forEach(k => {
-            const [type, ...rest] = k.split(':');
-            const val = rest.join(':');
-            values.push({ type: type as 'value' | 'color', val, count: counts[k] });
-        });
-
-        // Sort by frequency
-        return values.sort((a, b) => b.count - a.count);
+    // Unique values and colors for a selected header, counted by the server
+    const loadColumnValues = async (header: string) => {
+        if (!selectedSheet || !sessionId) return;
+        setColumnValues([]);
+        try {
+            const res = await client.get(`/import/sessions/${sessionId}/values`, {
+                params: { sheet_name: selectedSheet.sheet_name, header },
+            });
+            setColumnValues(res.data);
+        } catch (e) {
+            console.error(e);
+        }
     };
 
     const openValueMapping = (colKey: string) => {
@@ -149,6 +130,7 @@ export default function ImportDataScreen() {
             return;
         }
         setActiveColKey(colKey);
+        loadColumnValues(mapping[colKey]!);
         setMappingModalVisible(true);
     };
 
@@ -177,7 +159,7 @@ export default function ImportDataScreen() {
                 value_mapping: valueMapping,
                 constants: constants,
                 merge_strategy: mergeStrategy,
-                data: sheetRows[selectedSheet.sheet_name] || []
+                session_id: sessionId
             };
 
             const res = await client.post('/import/execute', payload);
@@ -267,7 +249,7 @@ export default function ImportDataScreen() {
     const renderValueMappingModal = () => {
         if (!activeColKey || !mapping[activeColKey]) return null;
         const header = mapping[activeColKey]!;
-        const uniqueValues = getUniqueValues(header);
+        const uniqueValues = columnValues;
         const currentMap = valueMapping[activeColKey] || {};
         const isStatusColumn = activeColKey === "status";
         const isProgressColumn = activeColKey === "progress";
@@ -1,6 +1,7 @@
 import { create } from 'zustand';
 import AsyncStorage from '@react-native-async-storage/async-storage';
 import client from '../api/client';
+import { useGamesStore } from './useGamesStore';
 
 type User = {
     id: number;
@@ -35,6 +36,7 @@ export const useAuthStore = create<AuthState>((set, get) => ({
     logout: async () => {
         await AsyncStorage.removeItem('user-token');
         await AsyncStorage.removeItem('user-username');
+        useGamesStore.getState().reset();
         set({ token: null, user: null, isLoading: false });
     },
     checkAuth: async () => {
@@ -0,0 +1,42 @@
+import { create } from 'zustand';
+import client from '../api/client';
+
+export type Game = {
+    id: number;
+    title: string;
+    status: string;
+    hype_score?: number;
+    rating?: number;
+};
+
+type GamesState = {
+    games: Record<number, Game>;
+    cursor: string | null;
+    owner: string | null;
+    // Fetches only what changed since the last sync (everything the first time)
+    sync: (username: string) => Promise<void>;
+    reset: () => void;
+};
+
+export const useGamesStore = create<GamesState>((set, get) => ({
+    games: {},
+    cursor: null,
+    owner: null,
+    sync: async (username) => {
+        if (get().owner !== username) {
+            set({ games: {}, cursor: null, owner: username });
+        }
+        let { games, cursor } = get();
+        games = { ...games };
+        let hasMore = true;
+        while (hasMore) {
+            const res = await client.get('/games/changes', { params: cursor ? { since: cursor } : {} });
+            res.data.deleted.forEach((id: number) => { delete games[id]; });
+            res.data.changed.forEach((game: Game) => { games[game.id] = game; });
+            cursor = res.data.cursor;
+            hasMore = res.data.has_more;
+        }
+        set({ games, cursor });
+    },
+    reset: () => set({ games: {}, cursor: null, owner: null }),
+}));